@@ -6,8 +6,10 @@ import streamlit.components.v1 as components
 
 # --- IMPORTS MODULAIRES (V2 ARCHITECTURE) ---
 from src.config import C_BG, C_TEXT, C_ACCENT, C_GOLD, C_BLUE, C_GREEN, SEASONS_CONFIG
-from src.data_loader import load_data
-from src.stats import compute_stats
+from src.data_loader import load_data, refresh_data, get_data_status, get_season_stats
+from src.stats import period_stats
+from src.streaks import team_streaks
+from src.aggregates import pick_table, pick_slice
 import src.views as views
 
 # --- 1. CONFIGURATION & ASSETS ---
@@ -287,6 +289,8 @@ try:
     with st.spinner('🦖 Analyse des données en cours...'):
         # LOAD DATA
         df, team_rank, bp_map, team_history, daily_max_map = load_data()
+        # Stats saison complète tenues à jour par le loader (pas de recalcul complet)
+        season_stats = get_season_stats(df)
     
     # --- SÉLECTEUR TEMPOREL (SIDEBAR) ---
     with st.sidebar:
@@ -334,7 +338,10 @@ try:
         if st.button("🔄 ACTUALISER LES DONNÉES", use_container_width=True):
             current_time = time.time()
             if current_time - st.session_state['last_refresh_time'] > 60:
-                st.cache_data.clear()
+                # Pas de st.cache_data.clear() : les caches sont indexés sur le contenu,
+                # seules les données réellement modifiées seront recalculées. La relecture
+                # contourne le cache de lecture de la source (Sheets relu tout de suite)
+                refresh_data()
                 st.session_state['last_refresh_time'] = current_time
                 st.toast("✅ Données mises à jour !", icon="🦖")
                 time.sleep(1) # Petit délai pour l'UX
@@ -343,16 +350,23 @@ try:
                 wait_time = 60 - int(current_time - st.session_state['last_refresh_time'])
                 st.toast(f"⏳ Doucement ! Attendez encore {wait_time}s.", icon="✋")
 
+        # BADGE FRAÎCHEUR (Snapshot local servi pendant le refresh ou si Sheets est KO)
+        data_status = get_data_status()
+        if data_status['stale']:
+            as_of_txt = data_status['as_of'].strftime('%d/%m %H:%M') if data_status['as_of'] else "?"
+            st.markdown(f"<div style='text-align:center; margin-top:8px; padding:6px 10px; border-radius:8px; border:1px solid {C_GOLD}; color:{C_GOLD}; font-family:Rajdhani; font-weight:700; font-size:0.8rem; letter-spacing:1px'>⚠️ DONNÉES EN CACHE • MAJ {as_of_txt}</div>", unsafe_allow_html=True)
+
         start_pick, end_pick = SEASONS_CONFIG[selected_season_name]
         
         latest_pick = 0 
         
-        # --- CRUCIAL : ON GARDE UNE COPIE DE TOUTE LA SAISON (POUR HOF & RECORDS & BONUS & NO-CARROT) ---
-        df_full_history = df.copy() if df is not None else pd.DataFrame()
+        # --- CRUCIAL : ON GARDE TOUTE LA SAISON (POUR HOF & RECORDS & BONUS & NO-CARROT) ---
+        # Pas de copie : stats et vues ne modifient jamais les frames reçues
+        df_full_history = df if df is not None else pd.DataFrame()
 
-        # FILTRAGE POUR L'AFFICHAGE (Dashboard, Lab, etc.)
+        # FILTRAGE POUR L'AFFICHAGE (Dashboard, Lab, etc.) : tranche sans copie (frame triée par Pick)
         if df is not None and not df.empty:
-            df = df[(df['Pick'] >= start_pick) & (df['Pick'] <= end_pick)].copy()
+            df = pick_slice(df, start_pick, end_pick)
             
             if df.empty and selected_season_name != "🏆 SAISON COMPLÈTE":
                 st.warning(f"⏳ La période '{selected_season_name}' n'a pas encore commencé.")
@@ -391,27 +405,26 @@ try:
     
     # GLOBAL METRIC
     if df is not None and not df.empty:
-        team_avg_per_pick = df['Score'].mean()
+        team = pick_table(df)
+        team_avg_per_pick = team['Total'].sum() / team['Players'].sum()
     else:
         team_avg_per_pick = 0
 
     if df is not None and not df.empty:
         latest_pick = df['Pick'].max()
-        day_df = df[df['Pick'] == latest_pick].sort_values('Score', ascending=False).copy()
+        day_df = pick_slice(df, latest_pick, latest_pick).sort_values('Score', ascending=False)
         
         # COMPUTE STATS
-        full_stats = compute_stats(df, bp_map, daily_max_map)
+        # Stats de la période : précalculées une fois par version des données
+        # (seules les colonnes lues par la page sont calculées, + BP_Count pour le total équipe)
+        page_metrics = views.PAGE_METRICS.get(menu, []) + ['BP_Count']
+        full_stats = period_stats(df_full_history, bp_map, daily_max_map, selected_season_name, season_stats, page_metrics)
         
         # OPTIMISATION : BP Calculation Check DIRECTEMENT depuis le dataframe
         total_bp_team = full_stats['BP_Count'].sum()
 
         # --- CALCUL TEAM NO CARROT STREAK (TASK 4) ---
-        team_streak_nc = 0
-        sorted_picks = sorted(df['Pick'].unique(), reverse=True)
-        for p_id in sorted_picks:
-            daily_min = df[df['Pick'] == p_id]['Score'].min()
-            if daily_min >= 20: team_streak_nc += 1
-            else: break
+        team_streak_nc = int(team_streaks(df, [20])['Current20'])
             
         # --- ROUTING VERS LES VUES MODULAIRES ---
         if menu == "Dashboard":
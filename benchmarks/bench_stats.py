@@ -0,0 +1,288 @@
+import os
+import sys
+import time
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run import build_context, compute_stats_raw
+from src.stats import StatsAccumulator
+
+# --- BENCHMARK compute_stats : BOUCLE PAR JOUEUR vs VERSION VECTORISÉE ---
+# Vérifie aussi que les deux versions et l'accumulateur du loader donnent
+# exactement le même tableau (y compris avec des scores négatifs).
+#
+#   python -m benchmarks.bench_stats --players 10 500
+
+
+def legacy_compute_stats(df, bp_map, daily_max_map):
+    """Implémentation historique (boucle par joueur), conservée comme référence."""
+    stats = []
+    if df.empty: return pd.DataFrame()
+    
+    # --- PRÉ-CALCULS GLOBAUX (CONTEXTE) ---
+    
+    # 1. Rangs du soir (RankDesc pour Medalist, RankAsc pour Shield) et écart à
+    # la moyenne du soir (Dominator) : colonnes calculées à l'ingestion
+    daily_groups = df.groupby('Pick')['Score']
+    
+    # 2. Identification du "Pire soir" pour The Savior
+    daily_sums = daily_groups.sum()
+    worst_night_pick = daily_sums.idxmin() if not daily_sums.empty else -1
+    
+    # 3. Soloist : Soirs où un SEUL joueur a dépassé 40
+    over_40 = df[df['Score'] > 40].groupby('Pick')['Player'].count()
+    soloist_picks = over_40[over_40 == 1].index.tolist()
+
+    # --- CALCULS PAR JOUEUR ---
+    
+    # Prép. Trend Data
+    trend_data = {}
+    for p, d in df.sort_values('Pick').groupby('Player', observed=True): 
+        trend_data[p] = d['Score'].tail(20).tolist()
+    
+    season_avgs = df.groupby('Player', observed=True)['Score'].mean()
+    season_avgs_raw = df.groupby('Player', observed=True)['ScoreVal'].mean()
+    latest_pick = df['Pick'].max()
+    
+    # Moyennes glissantes globales
+    df_15 = df[df['Pick'] > (latest_pick - 15)]
+    avg_15 = df_15.groupby('Player', observed=True)['Score'].mean()
+    df_10 = df[df['Pick'] > (latest_pick - 10)]
+    avg_10 = df_10.groupby('Player', observed=True)['Score'].mean()
+
+    for p in df['Player'].unique():
+        d = df[df['Player'] == p].sort_values('Pick')
+        
+        # Vecteurs de données
+        scores = d['Score'].values
+        scores_raw = d['ScoreVal'].values
+        picks = d['Pick'].values
+        bonuses = d['IsBonus'].values
+        z_scores = d['ZScore'].values
+        is_bp_list = d['IsBP'].values
+        ranks_desc = d['RankDesc'].values
+        ranks_asc = d['RankAsc'].values
+        gaps_to_mean = d['GapToMean'].values
+        
+        # --- 1. METRIQUES CLASSIQUES ---
+        bonus_data = d[d['IsBonus'] == True]
+        scores_with_bonus = bonus_data['Score'].values
+        scores_without_bonus = d[d['IsBonus'] == False]['Score'].values
+        
+        avg_with_bonus = scores_with_bonus.mean() if len(scores_with_bonus) > 0 else 0
+        avg_without_bonus = scores_without_bonus.mean() if len(scores_without_bonus) > 0 else 0
+        best_with_bonus = scores_with_bonus.max() if len(scores_with_bonus) > 0 else 0
+        best_without_bonus = scores_without_bonus.max() if len(scores_without_bonus) > 0 else 0 
+        
+        # --- 2. SÉRIES HISTORIQUES (Fonction Helper) ---
+        def get_max_streak(val_list, threshold):
+            max_s = 0
+            curr_s = 0
+            for v in val_list:
+                if v >= threshold:
+                    curr_s += 1
+                    max_s = max(max_s, curr_s)
+                else:
+                    curr_s = 0
+            return max_s
+
+        # Séries en cours (Trends)
+        current_no_carrot_streak = 0
+        for s in reversed(scores):
+            if s >= 20: current_no_carrot_streak += 1
+            else: break
+            
+        streak_30_curr = 0
+        for s in reversed(scores):
+            if s >= 30: streak_30_curr += 1
+            else: break
+
+        # Séries HoF
+        max_no_carrot = get_max_streak(scores, 20)
+        max_unstoppable = get_max_streak(scores, 40)
+        max_alien_streak = get_max_streak(scores, 60)
+        
+        # --- 3. LOGIQUES SPÉCIFIQUES HOF ---
+        try: prime_time = d.groupby('Month', observed=True)['Score'].mean().max()
+        except: prime_time = 0
+        
+        iron_lungs = scores_raw.sum()
+        sixth_man_count = len(scores[(scores >= 30) & (scores < 40)])
+        medalist_count = np.sum(ranks_desc <= 3)
+        last_place_count = np.sum(ranks_asc == 1)
+        
+        dominator_count = int(np.sum(gaps_to_mean > 0))
+                
+        savior_val = 0
+        savior_match = d[d['Pick'] == worst_night_pick]
+        if not savior_match.empty:
+            savior_val = savior_match['Score'].iloc[0]
+            
+        soloist_count = len(d[d['Pick'].isin(soloist_picks) & (d['Score'] > 40)])
+        
+        ghost_count = 0
+        for sc, rk in zip(scores, ranks_desc):
+            if sc > 35 and rk > 1:
+                ghost_count += 1
+                
+        # CORRECTION BAD LUCK : Score BRUT max sans BP
+        non_bp_raw_scores = scores_raw[~is_bp_list]
+        bad_luck_score = non_bp_raw_scores.max() if len(non_bp_raw_scores) > 0 else 0
+        
+        bp_scores_only = scores[is_bp_list]
+        braqueur_score = bp_scores_only.min() if len(bp_scores_only) > 0 else 999 
+        
+        deck_score = 0
+        if len(scores) >= 7:
+            deck_score = pd.Series(scores).rolling(window=7).sum().max()
+            
+        phoenix_score = 0
+        for i in range(1, len(scores)):
+            if scores[i-1] < 20 and scores[i] > phoenix_score: 
+                phoenix_score = scores[i]
+
+        try:
+            vals, counts = np.unique(scores, return_counts=True)
+            max_count_idx = np.argmax(counts)
+            mode_score = vals[max_count_idx]
+            mode_count = counts[max_count_idx]
+        except: mode_score = 0; mode_count = 0
+
+        spread = scores.max() - scores.min()
+
+        # --- 4. EXPORT ---
+        scores_last_7 = d['Score'].tail(7)
+        avg_last_7 = scores_last_7.mean() if len(scores_last_7) > 0 else 0
+        diff_7 = avg_last_7 - scores.mean() 
+        trend_icon = "↗️" if diff_7 >= 1 else ("↘️" if diff_7 <= -1 else "➡️")
+        
+        last_5 = scores[-5:]
+        last5_avg = last_5.mean() if len(scores) >= 5 else scores.mean()
+        momentum = last5_avg - scores.mean()
+        
+        bp_count = d['IsBP'].sum()
+        
+        alpha_count = 0; bonus_points_gained = 0; bonus_scores_list = []
+        for i, (pick_num, score) in enumerate(zip(picks, scores)):
+            if pick_num in daily_max_map and score >= daily_max_map[pick_num] and score > 0: alpha_count += 1
+            if bonuses[i]: 
+                gain = score - scores_raw[i]
+                bonus_points_gained += gain
+                bonus_scores_list.append(score)
+        
+        best_bonus = max(bonus_scores_list) if bonus_scores_list else 0
+        worst_bonus = min(bonus_scores_list) if bonus_scores_list else 0
+        avg_bonus_score = np.mean(bonus_scores_list) if bonus_scores_list else 0
+        
+        s_avg = season_avgs.get(p, 0)
+        s_avg_raw = season_avgs_raw.get(p, 0)
+        l15_avg = avg_15.get(p, s_avg)
+        l10_avg = avg_10.get(p, s_avg)
+        progression_pct = ((l15_avg - s_avg) / s_avg) * 100 if s_avg > 0 else 0
+        reliability_pct = ((len(scores) - len(scores[scores < 20])) / len(scores)) * 100
+        avg_z = np.mean(z_scores) if len(z_scores) > 0 else 0
+        
+        count_20_30 = len(scores[(scores >= 20) & (scores <= 30)])
+
+        stats.append({
+            'Player': p, 'Games': len(scores),
+            'Total': scores.sum(), 'Moyenne': scores.mean(), 'Moyenne_Raw': s_avg_raw,
+            'StdDev': scores.std(), 'Best': scores.max(), 'Best_Raw': scores_raw.max(),
+            'Worst': scores.min(), 'Worst_Raw': scores_raw.min(), 
+            'Last': scores[-1], 'LastIsBonus': bonuses[-1] if len(bonuses) > 0 else False, 
+            'Last5': last5_avg, 'Last10': l10_avg, 'Last15': l15_avg,
+            
+            # Counts
+            'Count30': len(scores[scores >= 30]), 'Count40': len(scores[scores >= 40]),
+            'Count35': len(scores[scores > 35]), 'Count2030': count_20_30,
+            'Carottes': len(scores[scores < 20]), 'Nukes': len(scores[scores >= 50]),
+            'BP_Count': bp_count, 'Alpha_Count': alpha_count,
+            
+            # HOF New Metrics
+            'MaxUnstoppable': max_unstoppable,
+            'PrimeTime': prime_time,
+            'IronLungs': iron_lungs,
+            'SixthMan': sixth_man_count,
+            'Medalist': medalist_count,
+            'ShieldCount': last_place_count,
+            'Dominator': dominator_count,
+            'SaviorScore': savior_val,
+            'Soloist': soloist_count,
+            'Ghost': ghost_count,
+            'Braqueur': braqueur_score,
+            'BadLuck': bad_luck_score,
+            'MaxDeck': deck_score,
+            'MaxPhoenix': phoenix_score,
+            'CurrentNoCarrot': current_no_carrot_streak, 
+            'MaxNoCarrot': max_no_carrot, 
+            'MaxAlien': max_alien_streak,
+            
+            # Context
+            'Bonus_Gained': bonus_points_gained, 'Best_Bonus': best_bonus, 'Worst_Bonus': worst_bonus,
+            'Avg_Bonus': avg_bonus_score, 'Momentum': momentum, 'ProgressionPct': progression_pct, 
+            'ReliabilityPct': reliability_pct, 'AvgZ': avg_z, 'Trend': trend_data.get(p, []), 
+            'AvgWithBonus': avg_with_bonus, 'AvgWithoutBonus': avg_without_bonus, 'BonusPlayed': len(scores_with_bonus),
+            'ModeScore': mode_score, 'ModeCount': mode_count, 'Spread': spread, 'Trend7Icon': trend_icon
+        })
+    return pd.DataFrame(stats)
+
+
+def _same_output(a, b):
+    assert list(a.columns) == list(b.columns)
+    for col in a.columns:
+        if col == 'Trend':
+            assert all(list(x) == list(y) for x, y in zip(a[col], b[col]))
+        else:
+            pd.testing.assert_series_equal(a[col], b[col], check_dtype=False, check_exact=False, rtol=1e-9)
+
+
+def _check_equivalence(df, bp_map, daily_max_map):
+    """Boucle historique, registre de métriques et accumulateur : même tableau."""
+    reference = legacy_compute_stats(df.copy(), bp_map, daily_max_map)
+    _same_output(reference, compute_stats_raw(df.copy(), bp_map, daily_max_map))
+    _same_output(reference, StatsAccumulator.from_frame(df).to_frame())
+
+
+def _best_time(func, args_factory, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        args = args_factory()
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="compute_stats : boucle vs vectorisé.")
+    parser.add_argument("--players", type=int, nargs="+", default=[10, 500])
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    vectorized = compute_stats_raw
+    print(f"{'joueurs':>8} {'lignes':>8} {'boucle':>12} {'vectorisé':>12} {'gain':>8}")
+    for n_players in args.players:
+        ctx = build_context(n_players, args.seasons)
+        df, bp_map, daily_max_map = ctx['df'], ctx['bp_map'], ctx['daily_max_map']
+        _check_equivalence(df, bp_map, daily_max_map)
+        for sheet_kwargs in ({'negative_rate': 0.5}, {'negative_bonus': True}):
+            neg = build_context(n_players, args.seasons, **sheet_kwargs)
+            _check_equivalence(neg['df'], neg['bp_map'], neg['daily_max_map'])
+
+        factory = lambda: (df.copy(), bp_map, daily_max_map)
+        t_loop = _best_time(legacy_compute_stats, factory, 1 if n_players > 100 else args.repeat)
+        t_vec = _best_time(vectorized, factory, args.repeat)
+        print(f"{n_players:>8} {len(df):>8} {t_loop * 1000:>10.1f}ms {t_vec * 1000:>10.1f}ms {t_loop / t_vec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
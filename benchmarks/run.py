@@ -0,0 +1,216 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import numpy as np
+
+# Exécutable depuis la racine du repo : python -m benchmarks.run
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synth import make_seasons, PICKS_PER_SEASON
+from src.sources import DataSource
+from src.data_loader import _full_load, _LoaderState
+from src.metrics import MetricContext
+from src.weekly import generate_weekly_report_data, generate_all_weekly_reports
+from src.odds import title_odds
+from src.aggregates import pick_slice
+from src import views
+
+# --- BENCHMARKS DE MONTÉE EN CHARGE ---
+# Chaque fonction chaude est chronométrée sur une grille joueurs x saisons.
+# Les vues render_* tournent en mode "bare" (sans serveur Streamlit) : les appels
+# st.* ne font rien, on mesure la préparation des données et des figures.
+#
+#   python -m benchmarks.run                         # grille par défaut
+#   python -m benchmarks.run --save-baseline b.json  # mémorise les temps
+#   python -m benchmarks.run --baseline b.json --budget 0.25   # échec si > +25 %
+
+DEFAULT_PLAYERS = [10, 100, 1000]
+DEFAULT_SEASONS = [1, 3, 10]
+
+
+class MemorySource(DataSource):
+    """Source en mémoire : mesure le parse sans coût réseau / disque."""
+    name = "bench"
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def read(self, first_col=None, n_rows=None):
+        return self.raw
+
+
+def _raw(func):
+    """Fonction sous-jacente d'un cache (st.cache_data ou cache_by_version) : on mesure le calcul."""
+    return getattr(func, "__wrapped__", func)
+
+
+def compute_stats_raw(df, bp_map, daily_max_map, metrics=None):
+    """compute_stats sans le contexte mis en cache : métriques recalculées à chaque appel."""
+    return MetricContext(df, bp_map, daily_max_map).frame(metrics)
+
+
+def build_context(n_players, n_seasons, seed=0, **sheet_kwargs):
+    """Prépare les entrées de toutes les fonctions pour une taille donnée (non chronométré)."""
+    raw = make_seasons(n_players, n_seasons, seed=seed, **sheet_kwargs)
+    state = _LoaderState()
+    state.loaded = _full_load(MemorySource(raw))
+    df, team_rank, bp_map, team_history, daily_max_map = state.result()
+
+    full_stats = compute_stats_raw(df, bp_map, daily_max_map)
+    latest_pick = df['Pick'].max()
+    day_df = df[df['Pick'] == latest_pick].sort_values('Score', ascending=False)
+    return {
+        'raw': raw, 'df': df, 'bp_map': bp_map, 'daily_max_map': daily_max_map,
+        'full_stats': full_stats, 'latest_pick': latest_pick, 'day_df': day_df,
+        'team_avg': df['Score'].mean(), 'max_deck': int(df['Deck'].max()),
+    }
+
+
+# Nom -> fonction(ctx) qui renvoie (callable, args). Stats et vues sont en lecture seule : pas de copie.
+CASES = {
+    'load_data': lambda c: (_full_load, (MemorySource(c['raw']),)),
+    'compute_stats': lambda c: (compute_stats_raw, (c['df'], c['bp_map'], c['daily_max_map'])),
+    'stats_dashboard': lambda c: (compute_stats_raw, (c['df'], c['bp_map'], c['daily_max_map'], views.PAGE_METRICS['Dashboard'])),
+    'weekly_report_data': lambda c: (_raw(generate_weekly_report_data), (c['df'], c['max_deck'])),
+    'weekly_reports_all': lambda c: (generate_all_weekly_reports, (c['df'],)),
+    # Mi-saison : saisons simulées (simulation_count) sur les picks restants
+    'title_odds': lambda c: (_raw(title_odds), (pick_slice(c['df'], 1, PICKS_PER_SEASON // 2),)),
+    'render_dashboard': lambda c: (views.render_dashboard, (c['day_df'], c['full_stats'], c['latest_pick'], c['team_avg'], 0, c['df'])),
+    'render_team_hq': lambda c: (views.render_team_hq, (c['df'], c['latest_pick'], 1, [1], c['team_avg'], 0, c['full_stats'])),
+    'render_player_lab': lambda c: (views.render_player_lab, (c['df'], c['full_stats'])),
+    'render_bonus_x2': lambda c: (views.render_bonus_x2, (c['df'],)),
+    'render_no_carrot': lambda c: (views.render_no_carrot, (c['df'], 0, c['full_stats'], c['df'])),
+    'render_trends': lambda c: (views.render_trends, (c['df'], c['latest_pick'])),
+    'render_hall_of_fame': lambda c: (views.render_hall_of_fame, (c['df'], c['bp_map'], c['daily_max_map'])),
+    'render_weekly_report': lambda c: (views.render_weekly_report, (c['df'],)),
+}
+
+
+def time_case(case, ctx, repeat):
+    """Meilleur temps (s) sur `repeat` exécutions."""
+    best = float('inf')
+    for _ in range(repeat):
+        func, args = CASES[case](ctx)
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+        if best > 1.0:
+            break  # Cas lent : une mesure suffit
+    return best
+
+
+def scaling_exponent(points):
+    """Pente log-log temps / nombre de lignes (1 = linéaire, 2 = quadratique)."""
+    points = [(r, t) for r, t in points if t > 0]
+    if len(points) < 2:
+        return None
+    rows, times = np.log([p[0] for p in points]), np.log([p[1] for p in points])
+    return float(np.polyfit(rows, times, 1)[0])
+
+
+def run(players, seasons, cases, repeat, max_seconds):
+    results = {}
+    too_slow = set()
+    sizes = sorted(((p, s) for p in players for s in seasons), key=lambda x: x[0] * x[1])
+    for n_players, n_seasons in sizes:
+        ctx = build_context(n_players, n_seasons)
+        rows = len(ctx['df'])
+        print(f"\n# {n_players} joueurs x {n_seasons} saison(s) ({n_seasons * PICKS_PER_SEASON} picks, {rows} lignes)")
+        for case in cases:
+            key = f"{case}@{n_players}x{n_seasons}"
+            if case in too_slow:
+                print(f"  {case:<22} ignoré (> {max_seconds}s sur une taille inférieure)")
+                continue
+            elapsed = time_case(case, ctx, repeat)
+            results[key] = {'case': case, 'players': n_players, 'seasons': n_seasons, 'rows': rows, 'seconds': elapsed}
+            print(f"  {case:<22} {elapsed * 1000:>10.1f} ms")
+            if elapsed > max_seconds:
+                too_slow.add(case)
+    return results
+
+
+def print_scaling(results):
+    print("\n# Courbes de montée en charge (exposant log-log vs lignes)")
+    by_case = {}
+    for r in results.values():
+        by_case.setdefault(r['case'], []).append((r['rows'], r['seconds']))
+    for case, points in by_case.items():
+        points.sort()
+        curve = "  ".join(f"{rows}:{sec * 1000:.0f}ms" for rows, sec in points)
+        exp = scaling_exponent(points)
+        exp_txt = f"{exp:.2f}" if exp is not None else "-"
+        print(f"  {case:<22} n^{exp_txt:<5} {curve}")
+
+
+def check_budget(results, baseline, budget, min_ms):
+    """Liste des régressions : temps > baseline x (1 + budget), hors mesures < min_ms."""
+    regressions = []
+    for key, r in results.items():
+        ref = baseline.get(key)
+        if ref is None or ref['seconds'] * 1000 < min_ms:
+            continue
+        ratio = r['seconds'] / ref['seconds']
+        if ratio > 1 + budget:
+            regressions.append((key, ref['seconds'], r['seconds'], ratio))
+    return regressions
+
+
+def write_html(results, path):
+    import plotly.express as px
+    import pandas as pd
+    frame = pd.DataFrame(results.values())
+    frame['ms'] = frame['seconds'] * 1000
+    fig = px.line(frame.sort_values('rows'), x='rows', y='ms', color='case', markers=True,
+                  log_x=True, log_y=True, title="Benchmarks : temps vs lignes")
+    fig.write_html(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de montée en charge (joueurs x saisons).")
+    parser.add_argument("--players", type=int, nargs="+", default=DEFAULT_PLAYERS)
+    parser.add_argument("--seasons", type=int, nargs="+", default=DEFAULT_SEASONS)
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float, default=30.0,
+                        help="Au-delà, la fonction n'est plus mesurée sur les tailles supérieures")
+    parser.add_argument("--json", help="Écrit les résultats en JSON")
+    parser.add_argument("--html", help="Écrit les courbes (plotly, log-log) en HTML")
+    parser.add_argument("--baseline", help="JSON de référence (produit par --save-baseline)")
+    parser.add_argument("--save-baseline", help="Écrit les résultats comme nouvelle référence")
+    parser.add_argument("--budget", type=float, default=0.25, help="Régression tolérée (0.25 = +25 %%)")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="Ignore les mesures de référence trop courtes (bruit)")
+    args = parser.parse_args(argv)
+
+    # Mode bare : on coupe les avertissements "missing ScriptRunContext"
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    results = run(args.players, args.seasons, args.cases, args.repeat, args.max_seconds)
+    print_scaling(results)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+    if args.html:
+        write_html(results, args.html)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = check_budget(results, baseline, args.budget, args.min_ms)
+        if regressions:
+            print(f"\n❌ {len(regressions)} régression(s) au-delà du budget (+{args.budget:.0%}) :")
+            for key, ref, new, ratio in regressions:
+                print(f"  {key:<36} {ref * 1000:.1f} ms -> {new * 1000:.1f} ms (x{ratio:.2f})")
+            return 1
+        print(f"\n✅ Aucune régression au-delà du budget (+{args.budget:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import argparse
+import datetime
+import numpy as np
+import pandas as pd
+
+# --- GÉNÉRATEUR D'ONGLETS "VALEURS" SYNTHÉTIQUES ---
+# Même mise en page que la feuille réelle : ligne Mois, ligne Deck (numéro sur
+# la première colonne de chaque Deck, cases vides ensuite), ligne Pick, puis un
+# joueur par ligne et les lignes de fin ("Team Raptors", "Score BP"...).
+
+PICKS_PER_SEASON = 165
+MONTHS = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet",
+          "août", "septembre", "octobre", "novembre", "décembre"]
+
+
+def make_sheet(n_players=10, n_picks=PICKS_PER_SEASON, seed=0, dnp_rate=0.05, bonus_rate=0.04,
+               bp_rate=0.06, comma_rate=0.01, negative_rate=0.0, negative_bonus=False, deck_len=7, start=datetime.date(2025, 10, 21)):
+    """
+    Matrice brute (DataFrame header=None, cellules string, NaN = case vide).
+    dnp_rate : cases vides (DNP), bonus_rate : suffixe "*", bp_rate : suffixe "!",
+    comma_rate : décimales à la française ("12,5"), negative_rate : scores négatifs (-1 à -9),
+    negative_bonus : tous les picks bonus négatifs.
+    """
+    rng = np.random.default_rng(seed)
+    picks = np.arange(1, n_picks + 1)
+
+    months = [MONTHS[(start + datetime.timedelta(days=int(p) - 1)).month - 1] for p in picks]
+    decks = [str((p - 1) // deck_len + 1) if (p - 1) % deck_len == 0 else np.nan for p in picks]
+    header = [["Mois"] + months, ["Deck"] + decks, ["Pick"] + [str(p) for p in picks]]
+
+    # Scores ~ Gamma (moyenne ~36, longue traîne comme les vrais scores TTFL)
+    values = rng.gamma(4, 9, size=(n_players, n_picks)).astype(int)
+    negative = rng.random((n_players, n_picks)) < negative_rate
+    values[negative] = -rng.integers(1, 10, size=int(negative.sum()))
+    cells = values.astype(str).astype(object)
+    with_comma = rng.random((n_players, n_picks)) < comma_rate
+    cells[with_comma] = cells[with_comma] + ",5"
+    is_bonus = rng.random((n_players, n_picks)) < bonus_rate
+    if negative_bonus:
+        values[is_bonus] = -rng.integers(1, 10, size=int(is_bonus.sum()))
+        cells[is_bonus] = values[is_bonus].astype(str)
+    cells[is_bonus] = cells[is_bonus] + "*"
+    is_bp = rng.random((n_players, n_picks)) < bp_rate
+    cells[is_bp] = cells[is_bp] + "!"
+    cells[rng.random((n_players, n_picks)) < dnp_rate] = np.nan
+
+    players = np.array([f"Player{i:04d}" for i in range(n_players)], dtype=object).reshape(-1, 1)
+    body = np.hstack([players, cells])
+
+    footer = [["Team Raptors"] + values.sum(axis=0).astype(str).tolist(),
+              ["Score BP"] + values.max(axis=0).astype(str).tolist()]
+
+    rows = header + body.tolist() + footer
+    return pd.DataFrame(rows, dtype=object)
+
+
+def make_seasons(n_players=10, n_seasons=1, seed=0, **kwargs):
+    """Plusieurs saisons bout à bout dans un seul onglet (n_seasons x 165 picks)."""
+    return make_sheet(n_players=n_players, n_picks=n_seasons * PICKS_PER_SEASON, seed=seed, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Écrit un onglet 'Valeurs' synthétique en CSV.")
+    parser.add_argument("out", help="Fichier CSV de sortie")
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--picks", type=int, default=PICKS_PER_SEASON)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dnp-rate", type=float, default=0.05)
+    parser.add_argument("--bonus-rate", type=float, default=0.04)
+    parser.add_argument("--bp-rate", type=float, default=0.06)
+    args = parser.parse_args()
+
+    sheet = make_sheet(args.players, args.picks, seed=args.seed, dnp_rate=args.dnp_rate,
+                       bonus_rate=args.bonus_rate, bp_rate=args.bp_rate)
+    sheet.to_csv(args.out, header=False, index=False)
+    print(f"{args.out} : {args.players} joueurs x {args.picks} picks")
@@ -0,0 +1,198 @@
+import threading
+import numpy as np
+import pandas as pd
+
+# --- TABLE D'AGRÉGATS PAR PICK (ÉQUIPE) ---
+# Une ligne par pick : effectif, total, moyenne, écart-type, min/max, carottes,
+# nukes, porteur du BP, Deck et Mois. Construite une fois par version des
+# données par le loader et attachée à df.attrs['pick_table'] ; les vues et les
+# stats la lisent au lieu de refaire un groupby('Pick') sur toute la table longue.
+
+
+class _Shared:
+    """
+    Conteneur d'un agrégat dans df.attrs. pandas copie (deepcopy) et compare les
+    attrs à chaque opération : l'agrégat est partagé tel quel (immuable) et
+    comparé par identité, jamais élément par élément.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def _attach(df, key, value):
+    df.attrs[key] = _Shared(value)
+    return df
+
+
+def _attached(df, key):
+    shared = df.attrs.get(key)
+    return shared.value if shared is not None else None
+
+
+def attach_pick_table(df, table):
+    return _attach(df, 'pick_table', table)
+
+
+def attached_pick_table(df):
+    return _attached(df, 'pick_table')
+
+
+def pick_span(df):
+    """
+    (premier, dernier pick) si df est formé de picks complets de la frame du
+    loader (frame entière ou filtre de période), sinon None.
+    """
+    table = attached_pick_table(df)
+    if table is None or df.empty or table.empty:
+        return None
+    lo, hi = int(df['Pick'].min()), int(df['Pick'].max())
+    # Mêmes lignes que les picks couverts -> tous les scores de ces picks sont là
+    if int(table.loc[lo:hi, 'Players'].sum()) != len(df):
+        return None
+    return lo, hi
+
+
+def build_pick_table(df):
+    """Agrégats d'équipe par pick (index = Pick trié)."""
+    if df.empty:
+        return pd.DataFrame()
+    picks = df['Pick']
+    score = df['Score']
+    daily = score.groupby(picks, sort=True)
+    table = pd.DataFrame({
+        'Players': daily.size(),
+        'Total': daily.sum(),
+        'Mean': daily.mean(),
+        'Std': daily.std(ddof=0),       # Même convention que ZScore
+        'Min': daily.min(),
+        'Max': daily.max(),
+        'Carrots': (score < 20).groupby(picks, sort=True).sum(),
+        'Nukes': (score >= 50).groupby(picks, sort=True).sum(),
+        'Over40': (score > 40).groupby(picks, sort=True).sum(),
+    })
+
+    # Porteur du BP (!) : premier joueur marqué sur le pick, sinon vide
+    bp = df.loc[df['IsBP'].to_numpy(), ['Pick', 'Player', 'Score']].drop_duplicates('Pick').set_index('Pick')
+    table['BPPlayer'] = bp['Player'].astype(object).reindex(table.index)
+    table['BPScore'] = bp['Score'].reindex(table.index)
+
+    first = df.drop_duplicates('Pick').set_index('Pick')
+    table['Deck'] = first['Deck'].reindex(table.index)
+    table['Month'] = first['Month'].astype(object).reindex(table.index)
+    table.index.name = 'Pick'
+    return table
+
+
+def update_pick_table(table, fresh, replaced_picks):
+    """Table après un refresh incrémental : fresh = build_pick_table des seuls picks relus."""
+    kept = table[~table.index.isin(replaced_picks)] if table is not None else None
+    if kept is None or kept.empty:
+        return fresh
+    return pd.concat([kept, fresh]).sort_index()
+
+
+def pick_slice(df, start, end):
+    """
+    Picks [start, end] de df. La frame du loader est triée par Pick : bornes
+    trouvées par searchsorted et tranche iloc sans copie (copy-on-write).
+    Frame non triée : filtre booléen classique.
+    """
+    picks = df['Pick']
+    if not picks.is_monotonic_increasing:
+        return df[(picks >= start) & (picks <= end)]
+    lo = picks.searchsorted(start, side='left')
+    hi = picks.searchsorted(end, side='right')
+    return df.iloc[lo:hi]
+
+
+def pick_table(df):
+    """
+    Agrégats par pick de df. Si df est la table du loader (ou une tranche de
+    picks complets, ex: filtre de période), on relit la table attachée ;
+    sinon (sous-ensemble de joueurs, frame reconstruite...) on la recalcule.
+    """
+    span = pick_span(df)
+    if span is not None:
+        return attached_pick_table(df).loc[span[0]:span[1]]
+    return build_pick_table(df)
+
+
+# --- INDEX DE FENÊTRES (SOMMES CUMULÉES PAR JOUEUR) ---
+# Pour chaque joueur et chaque métrique, cumul sur les picks 0..N : le total
+# d'une fenêtre [début, fin] est cum[fin] - cum[début - 1], en O(1) par joueur.
+# Attaché (vide) par le loader et partagé par toutes les tranches de la frame :
+# construit au premier usage, puis chaque période (SEASONS_CONFIG) ou Deck lit
+# ses totaux sans regrouper df. Fenêtres glissantes : src/rolling.py.
+
+RANGE_METRICS = ['Games', 'Total', 'TotalRaw', 'Carottes', 'Count30', 'Count40', 'Nukes', 'BP_Count']
+
+
+class PickRangeIndex:
+
+    def __init__(self, df):
+        self._source = df[['Player', 'Pick', 'Score', 'ScoreVal', 'IsBP']]
+        self._source.attrs = {}
+        self._lock = threading.Lock()
+        self._built = False
+
+    def _build(self):
+        with self._lock:
+            if self._built:
+                return
+            df = self._source
+            codes, players = pd.factorize(df['Player'])
+            picks = df['Pick'].to_numpy().astype(np.int64)
+            n_picks = int(picks.max()) + 1 if len(picks) else 1
+            score = df['Score'].to_numpy().astype(np.int64)
+            values = [np.ones(len(df), dtype=np.int64), score, df['ScoreVal'].to_numpy().astype(np.int64),
+                      score < 20, score >= 30, score >= 40, score >= 50, df['IsBP'].to_numpy()]
+            cum = np.zeros((len(RANGE_METRICS), len(players), n_picks + 1), dtype=np.int32)
+            for k, v in enumerate(values):
+                # Colonne p + 1 = valeur du pick p (un score par joueur et par pick) ; colonne 0 = cumul vide
+                cum[k, codes, picks + 1] = v
+            self.players = pd.Index(np.asarray(players, dtype=object), name='Player')
+            self.cum = np.cumsum(cum, axis=2, dtype=np.int32)
+            self._source = None
+            self._built = True
+
+    def sums(self, start, end):
+        """Tableau (métriques x joueurs) des totaux sur les picks [start, end]."""
+        if not self._built:
+            self._build()
+        start = max(int(start), 0)
+        end = min(int(end), self.cum.shape[2] - 2)
+        if end < start:
+            return np.zeros(self.cum.shape[:2], dtype=np.int64)
+        return self.cum[:, :, end + 1].astype(np.int64) - self.cum[:, :, start]
+
+
+def attach_range_index(df):
+    """Index de fenêtres (construit au premier usage) partagé par les tranches de df."""
+    return _attach(df, 'range_index', PickRangeIndex(df))
+
+
+def window_sums(df):
+    """
+    Totaux RANGE_METRICS par joueur de df (index = Player). Tranche de
+    picks complets de la frame du loader : lecture de l'index de fenêtres ;
+    sinon somme directe sur df.
+    """
+    index = _attached(df, 'range_index')
+    span = pick_span(df) if index is not None else None
+    if span is not None:
+        sums = index.sums(span[0], span[1])
+        played = sums[0] > 0
+        return pd.DataFrame(sums[:, played].T, columns=RANGE_METRICS, index=index.players[played])
+    score = df['Score']
+    values = pd.DataFrame({
+        'Games': 1, 'Total': score, 'TotalRaw': df['ScoreVal'], 'Carottes': score < 20,
+        'Count30': score >= 30, 'Count40': score >= 40, 'Nukes': score >= 50, 'BP_Count': df['IsBP'],
+    }, index=df.index)
+    sums = values.groupby(df['Player'].astype(object).to_numpy(), sort=True).sum().astype(np.int64)
+    sums.index.name = 'Player'
+    return sums
@@ -0,0 +1,150 @@
+import os
+import sys
+import datetime
+import hashlib
+import pandas as pd
+import streamlit as st
+from src.config import SEASON_ID
+from src.aggregates import build_pick_table, attach_pick_table, attach_range_index
+from src.cache import cache_by_version
+
+# --- ARCHIVE MULTI-SAISONS ---
+# Une partition Parquet par saison terminée : archive/season=<id>.parquet
+# (même schéma que la table longue du loader). Rien n'est lu tant qu'une vue
+# ne demande pas l'all-time : les pages de la saison en cours n'y touchent pas.
+
+ARCHIVE_DIR = os.environ.get(
+    "DINO_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "archive")
+)
+
+
+def _path(season):
+    return os.path.join(ARCHIVE_DIR, f"season={season}.parquet")
+
+
+def has_partition(season):
+    return os.path.exists(_path(season))
+
+
+def list_seasons():
+    """Saisons archivées (simple listing du dossier, aucun fichier lu)."""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    names = [f[len("season="):-len(".parquet")] for f in os.listdir(ARCHIVE_DIR)
+             if f.startswith("season=") and f.endswith(".parquet")]
+    return sorted(names)
+
+
+def past_seasons(current=SEASON_ID):
+    return [s for s in list_seasons() if s != current]
+
+
+def save_partition(season, df):
+    """Écriture atomique de la table longue d'une saison."""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = _path(season)
+    frame = df.copy(deep=False)
+    frame.attrs = {}
+    frame.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _read_partition(path, mtime_ns):
+    return pd.read_parquet(path)
+
+
+def load_partition(season):
+    path = _path(season)
+    return _read_partition(path, os.stat(path).st_mtime_ns)
+
+
+def _partitions_key(current):
+    """(saison, date de modification) de chaque partition archivée : change si l'archive est réécrite."""
+    return tuple((s, os.stat(_path(s)).st_mtime_ns) for s in past_seasons(current))
+
+
+def build_all_time(df_current, current=SEASON_ID):
+    """
+    Table all-time = saisons archivées + saison en cours, avec une colonne Season.
+    Pick et Deck sont renumérotés à la suite d'une saison à l'autre (la saison
+    N+1 commence après le dernier pick de la saison N) pour que les calculs par
+    pick / par série de compute_stats restent valables sur plusieurs saisons ;
+    Month est préfixé par la saison ("2024-25 Janvier").
+    Retourne (df, bp_map, daily_max_map) comme load_data(), en lecture seule :
+    construite une fois par (version de la saison en cours, partitions).
+    """
+    if df_current is None:
+        df_current = pd.DataFrame()
+    return _build_all_time(df_current, current, _partitions_key(current))
+
+
+@cache_by_version(max_entries=2)
+def _build_all_time(df_current, current, partitions):
+    from src.data_loader import compact_frame, add_pick_features
+
+    parts = [(s, load_partition(s)) for s, _ in partitions]
+    if not df_current.empty:
+        parts.append((current, df_current))
+
+    frames = []
+    pick_offset = 0
+    deck_offset = 0
+    for season, part in parts:
+        if part.empty:
+            continue
+        frame = part.copy()
+        frame['Pick'] = frame['Pick'].astype('int32') + pick_offset
+        frame['Deck'] = frame['Deck'].astype('int32') + deck_offset
+        frame['Season'] = season
+        # Mois qualifié par la saison : PrimeTime et le cube Mois ne fusionnent pas deux saisons
+        frame['Month'] = season + ' ' + frame['Month'].astype(str)
+        pick_offset = int(frame['Pick'].max())
+        deck_offset = int(frame['Deck'].max())
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(), {}, {}
+    df = compact_frame(pd.concat(frames, ignore_index=True))
+    df['Season'] = df['Season'].astype('category')
+    # Version all-time = saison en cours + partitions archivées (clé des caches par version)
+    current_version = df_current.attrs.get('fingerprint') if not df_current.empty else ''
+    if current_version is not None:
+        version = current_version + "".join(f"|{s}:{mtime}" for s, mtime in partitions)
+        df.attrs['fingerprint'] = hashlib.blake2b(version.encode(), digest_size=16).hexdigest()
+    if 'GapToMean' not in df.columns or df['GapToMean'].isna().any():
+        # Partition archivée avant les features par pick
+        df = add_pick_features(df)
+
+    table = build_pick_table(df)
+    attach_pick_table(df, table)
+    attach_range_index(df)
+    daily_max_map = {int(p): int(v) for p, v in table['Max'].items()}
+    bp_map = df[df['IsBP'] == True].set_index('Pick')['Score'].to_dict()
+    # Fallback si les "!" ne sont pas détectés (comme load_data)
+    return df, (bp_map if bp_map else dict(daily_max_map)), daily_max_map
+
+
+def archive_from_file(season, path, season_start):
+    """
+    Archive une saison passée à partir d'un export de son onglet "Valeurs"
+    (CSV/XLSX). season_start : date du Pick #1 de cette saison ("AAAA-MM-JJ").
+    """
+    from src.data_loader import parse_sheet, add_pick_features
+    from src.sources import LocalFileSource
+
+    df = parse_sheet(LocalFileSource(path).read(),
+                     season_start=datetime.datetime.fromisoformat(season_start))
+    if df.empty:
+        raise ValueError(f"Aucun score lu dans {path}")
+    save_partition(season, add_pick_features(df))
+    return len(df)
+
+
+if __name__ == "__main__":
+    # python -m src.archive <season_id> <export.csv|xlsx> <AAAA-MM-JJ>
+    if len(sys.argv) != 4:
+        sys.exit("Usage : python -m src.archive <season_id> <fichier> <date_pick_1>")
+    rows = archive_from_file(*sys.argv[1:])
+    print(f"Saison {sys.argv[1]} archivée : {rows} scores -> {_path(sys.argv[1])}")
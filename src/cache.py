@@ -0,0 +1,92 @@
+import os
+import functools
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+import pandas as pd
+import streamlit as st
+from src.aggregates import pick_span
+
+# --- CACHE INDEXÉ PAR VERSION DES DONNÉES ---
+# st.cache_data hache le contenu complet des DataFrames passés en argument à
+# chaque appel. Ici la clé est (version, paramètres) : la version est l'empreinte
+# posée par le loader (df.attrs['fingerprint']) + les picks couverts par la
+# tranche, calculée en O(1) sans sérialiser la frame.
+
+
+def data_version(df):
+    """
+    Jeton de version de df : (empreinte loader, premier pick, dernier pick).
+    None si df n'est pas la frame du loader ou une tranche de picks complets
+    (sous-ensemble de joueurs, frame reconstruite...) : pas de cache possible.
+    """
+    version = df.attrs.get('fingerprint')
+    if version is None or df.empty:
+        return None
+    span = pick_span(df)
+    if span is None:
+        return None
+    return (version,) + span
+
+
+def _param_key(value):
+    """Forme hashable d'un paramètre (dicts et listes figés, frames -> version)."""
+    if isinstance(value, pd.DataFrame):
+        version = data_version(value)
+        if version is None:
+            raise TypeError("DataFrame sans version")
+        return version
+    if isinstance(value, dict):
+        return frozenset((k, _param_key(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_param_key(v) for v in value)
+    hash(value)
+    return value
+
+
+@st.cache_resource(show_spinner=False)
+def _stores():
+    return {'lock': threading.Lock(), 'by_func': {}}
+
+
+@st.cache_resource(show_spinner=False)
+def process_pool():
+    """Pool de processus partagé entre sessions (gros calculs répartis par blocs)."""
+    return ProcessPoolExecutor(max_workers=os.cpu_count())
+
+
+def cache_by_version(max_entries=16):
+    """
+    Décorateur : mémorise func(df, *params) par (version de df, params).
+    Résultats partagés entre sessions : ils ne doivent pas être modifiés en place.
+    Sans version (ou paramètre non hashable), appel direct sans cache.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(df, *args, **kwargs):
+            version = data_version(df)
+            if version is None:
+                return func(df, *args, **kwargs)
+            try:
+                key = (version, _param_key(args), _param_key(tuple(sorted(kwargs.items()))))
+            except TypeError:
+                return func(df, *args, **kwargs)
+
+            stores = _stores()
+            with stores['lock']:
+                entries = stores['by_func'].setdefault(name, OrderedDict())
+                if key in entries:
+                    entries.move_to_end(key)
+                    return entries[key]
+
+            result = func(df, *args, **kwargs)
+            with stores['lock']:
+                entries[key] = result
+                while len(entries) > max_entries:
+                    entries.popitem(last=False)
+            return result
+
+        return wrapper
+    return decorator
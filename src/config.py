@@ -3,6 +3,11 @@
 # ✅ LIEN DE L'IMAGE DISCORD (RAW)
 DISCORD_AVATAR_URL = "https://raw.githubusercontent.com/pedrille/dino-fant/main/basketball_discord.png"
 
+# --- SOURCE DE DONNÉES ---
+# "gsheets" (Google Sheets via les secrets) ou chemin d'un export local CSV/XLSX
+# de l'onglet "Valeurs". Surchargeable par la variable d'environnement DINO_DATA_SOURCE.
+DATA_SOURCE = "gsheets"
+
 # --- CONFIG COULEURS JOUEURS (IDENTITÉ VISUELLE) ---
 PLAYER_COLORS = {
     "Pedrille": "#CE1141",      # Raptors Red
@@ -48,6 +53,13 @@ PACERS_PUNCHLINES = [
     "Si on retourne le classement, les Pacers sont enfin à leur vraie place 🙃"
 ]
 
+# --- SAISON EN COURS ---
+# Identifiant de la saison (nom de la partition d'archive) et date du Pick #1.
+# Au changement de saison : mettre à jour ces deux valeurs, la saison précédente
+# est archivée automatiquement (voir src/archive.py).
+SEASON_ID = "2025-26"
+SEASON_START = "2025-10-21"
+
 # --- CONFIG SAISONS (SPRINTS V22.0) ---
 # Bornes exactes basées sur le calendrier 2025-2026
 SEASONS_CONFIG = {
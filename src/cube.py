@@ -0,0 +1,58 @@
+import pandas as pd
+from src.config import SEASONS_CONFIG
+from src.cache import cache_by_version
+
+# --- CUBE D'AGRÉGATS (DECK / MOIS / PARTIE x JOUEUR) ---
+# Une ligne par (niveau, joueur) : total, moyenne, matchs, min, max, BP,
+# carottes, bonus joués et gain des bonus. Construit une fois par version des
+# données et par niveau ; le rapport hebdo, PrimeTime, l'onglet Bonus et les
+# trophées de partie le lisent au lieu de regrouper df à chaque appel.
+
+CUBE_LEVELS = ('Deck', 'Month', 'Part')
+SEASON_PARTS = {name: bounds for name, bounds in SEASONS_CONFIG.items() if "SAISON COMPLÈTE" not in name}
+
+
+def _part_labels(picks):
+    """Nom de la partie de SEASON_PARTS de chaque pick (NaN hors parties)."""
+    labels = pd.Series(pd.NA, index=picks.index, dtype=object)
+    for name, (start, end) in SEASON_PARTS.items():
+        labels[(picks >= start) & (picks <= end)] = name
+    return pd.Categorical(labels, categories=list(SEASON_PARTS))
+
+
+def build_rollup(df, level):
+    """Agrégats (level, Player) de df ; level parmi CUBE_LEVELS."""
+    score = df['Score']
+    keys = _part_labels(df['Pick']) if level == 'Part' else df[level]
+    frame = pd.DataFrame({
+        level: keys, 'Player': df['Player'], 'Score': score, 'BP': df['IsBP'],
+        'Carrot': score < 20, 'Bonus': df['IsBonus'],
+        'BonusGain': (score - df['ScoreVal']).where(df['IsBonus'], 0),
+    })
+    cube = frame.groupby([level, 'Player'], observed=True, sort=True).agg(
+        Total=('Score', 'sum'), Games=('Score', 'count'), Min=('Score', 'min'), Max=('Score', 'max'),
+        BP_Count=('BP', 'sum'), Carottes=('Carrot', 'sum'), BonusPlayed=('Bonus', 'sum'),
+        Bonus_Gained=('BonusGain', 'sum'),
+    )
+    cube['Moyenne'] = cube['Total'] / cube['Games']
+    return cube
+
+
+@cache_by_version(max_entries=16)
+def rollup(df, level):
+    """build_rollup mis en cache par version des données (lecture seule)."""
+    return build_rollup(df, level)
+
+
+def level_totals(cube):
+    """Agrégats d'équipe par valeur du niveau (somme sur les joueurs)."""
+    team = cube.drop(columns='Moyenne').groupby(level=0, observed=True, sort=True).sum()
+    team['Moyenne'] = team['Total'] / team['Games']
+    return team
+
+
+def deck_winners(df):
+    """Vainqueurs de chaque Deck (total max, ex-aequo inclus) : DataFrame Deck, Player."""
+    cube = rollup(df, 'Deck')
+    best = cube['Total'].groupby(level='Deck').transform('max')
+    return cube.index[cube['Total'] == best].to_frame(index=False)
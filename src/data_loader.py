@@ -1,175 +1,627 @@
 import streamlit as st
-from streamlit_gsheets import GSheetsConnection
 import pandas as pd
 import numpy as np
 import datetime
+import threading
+import time
+import hashlib
+from collections import namedtuple
+from src import snapshot, archive
+from src.config import SEASON_ID, SEASON_START
+from src.sources import get_data_source, slice_window
+from src.stats import StatsAccumulator
+from src.aggregates import build_pick_table, update_pick_table, attach_pick_table, attached_pick_table, attach_range_index
 from src.utils import normalize_month
 
 # --- CONFIGURATION ---
-# Date du Pick #1 (22 Octobre 2024)
-SEASON_START_DATE = datetime.datetime(2024, 10, 22)
+# Date du Pick #1 de la saison en cours (config.SEASON_START)
+SEASON_START_DATE = datetime.datetime.fromisoformat(SEASON_START)
 
-@st.cache_data(ttl=300, show_spinner=False)
-def load_data():
-    try:
-        # 1. CONNEXION SÉCURISÉE (Via vos secrets [connections.gsheets])
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        
-        # Récupération de l'URL depuis les secrets
-        url = st.secrets["SPREADSHEET_URL"]
-        
-        # Lecture complète de l'onglet "Valeurs" sans en-tête (header=None)
-        # On lit tout en string pour éviter les erreurs de conversion
-        df_raw = conn.read(spreadsheet=url, worksheet="Valeurs", header=None).astype(str)
-
-        # 2. REPÉRAGE DES LIGNES (Basé sur votre structure Excel)
-        # Ligne 1 (index 0) = Mois
-        # Ligne 2 (index 1) = Deck
-        # Ligne 3 (index 2) = Pick
-        pick_row_idx = 2
-        deck_row_idx = 1
-        players_start_row = 3
-
-        # Vérification de sécurité basique
-        first_col_val = str(df_raw.iloc[pick_row_idx, 0]).strip()
-        if "Pick" not in first_col_val:
-            # Fallback : on scanne si jamais ça a bougé
-            for i, row in df_raw.head(10).iterrows():
-                if "Pick" in str(row[0]):
-                    pick_row_idx = i
-                    deck_row_idx = i - 1
-                    players_start_row = i + 1
-                    break
-
-        # 3. EXTRACTION DES JOUEURS
-        players = []
-        player_indices = []
-        
-        for i in range(players_start_row, len(df_raw)):
-            val = str(df_raw.iloc[i, 0]).strip()
-            # Stop words
-            if val in ["nan", "None", "", "Team Raptors", "Score BP", "Classic", "Moyenne"]:
+# Rafraîchissement : TTL entre deux lectures, colonnes relues derrière le
+# watermark (corrections tardives) et relecture complète périodique
+# (nouveaux joueurs, corrections anciennes)
+# Stale-while-revalidate : passé REFRESH_TTL (TTL "soft") on sert les données
+# en place et on relit en tâche de fond ; passé HARD_TTL, la page attend la relecture
+REFRESH_TTL = 300
+HARD_TTL = 1800
+OVERLAP_COLS = 3
+FULL_RESYNC_EVERY = 12
+
+# Lignes d'arrêt de la colonne A (fin du bloc joueurs)
+STOP_WORDS = ["nan", "None", "", "Team Raptors", "Score BP", "Classic", "Moyenne"]
+
+# Schéma compact de la table longue : catégories pour les chaînes répétées,
+# int16 pour les entiers (picks < 200, scores < 200), booléens pour les flags
+SCHEMA = {
+    'Pick': 'int16', 'Deck': 'int16', 'Player': 'category', 'Score': 'int16',
+    'ScoreVal': 'int16', 'IsBonus': 'bool', 'IsBP': 'bool', 'Month': 'category',
+}
+
+
+def _as_text(values):
+    """Cellules en texte nettoyé ; les NaN (que astype(str) conserve en pandas 3) deviennent ''."""
+    return pd.Series(values, dtype=object).fillna('').astype(str).str.strip()
+
+
+def _to_number(values):
+    """Convertit une ligne/colonne de cellules texte en float (NaN si illisible)."""
+    s = _as_text(values).str.replace(',', '.', regex=False)
+    num = pd.to_numeric(s, errors='coerce').to_numpy(dtype=float)
+    return np.where(np.isfinite(num), num, np.nan)
+
+
+def locate_layout(df_raw):
+    """
+    Repère les lignes Deck / Pick et le bloc joueurs de l'onglet "Valeurs".
+    Retourne (pick_row_idx, deck_row_idx, players, player_indices).
+    """
+    # Ligne 1 (index 0) = Mois
+    # Ligne 2 (index 1) = Deck
+    # Ligne 3 (index 2) = Pick
+    pick_row_idx = 2
+    deck_row_idx = 1
+    players_start_row = 3
+
+    # Vérification de sécurité basique
+    first_col_val = str(df_raw.iloc[pick_row_idx, 0]).strip()
+    if "Pick" not in first_col_val:
+        # Fallback : on scanne si jamais ça a bougé
+        for i, row in df_raw.head(10).iterrows():
+            if "Pick" in str(row[0]):
+                pick_row_idx = i
+                deck_row_idx = i - 1
+                players_start_row = i + 1
                 break
-            players.append(val)
-            player_indices.append(i)
 
-        if not players:
+    # Colonne A lue en une fois, on coupe au premier mot d'arrêt
+    players = []
+    player_indices = []
+    first_col = [str(v).strip() for v in df_raw.iloc[players_start_row:, 0]]
+    for offset, val in enumerate(first_col):
+        if val in STOP_WORDS:
+            break
+        players.append(val)
+        player_indices.append(players_start_row + offset)
+
+    return pick_row_idx, deck_row_idx, players, player_indices
+
+
+def parse_sheet(df_raw, initial_deck=0, season_start=None):
+    """
+    Transforme la matrice brute "Valeurs" (tout en string) en DataFrame long
+    (une ligne par score joué). Version vectorisée : pas de boucle cellule par
+    cellule, tout le bloc joueurs est traité colonne par colonne en une passe.
+    La structure théorique des Decks est attachée dans df.attrs['deck_tracks'].
+    initial_deck : Deck en cours avant la première colonne (lecture partielle).
+    season_start : date du Pick #1 (par défaut la saison en cours).
+    """
+    pick_row_idx, deck_row_idx, players, player_indices = locate_layout(df_raw)
+    if not players:
+        return pd.DataFrame()
+
+    # Une seule extraction en matrice numpy, tout le reste travaille dessus
+    values = df_raw.to_numpy(dtype=object)
+
+    # 1. EN-TÊTES : Deck (forward-fill, gestion des trous) & Pick
+    deck_nums = _to_number(values[deck_row_idx, 1:])
+    deck_nums = np.trunc(pd.Series(deck_nums).ffill().fillna(initial_deck).to_numpy()).astype(np.int64)
+    pick_nums = _to_number(values[pick_row_idx, 1:])
+
+    valid_cols = ~np.isnan(pick_nums)
+    picks = np.trunc(pick_nums[valid_cols]).astype(np.int64)
+    decks = deck_nums[valid_cols]
+
+    # Structure théorique {deck_id: [pick_start, ... pick_end]} (ordre des colonnes)
+    deck_tracks = {}
+    for d, p in zip(decks.tolist(), picks.tolist()):
+        if d > 0:
+            deck_tracks.setdefault(d, []).append(p)
+
+    if len(picks) == 0:
+        return pd.DataFrame()
+
+    # 2. BLOC JOUEURS : transposé puis aplati -> ordre (colonne, joueur)
+    block = values[player_indices, 1:][:, valid_cols]
+    n_players, n_cols = block.shape
+    cells = _as_text(block.T.ravel())
+    col_pos = np.repeat(np.arange(n_cols), n_players)
+    player_pos = np.tile(np.arange(n_players), n_cols)
+
+    # Si vide -> DNP
+    played = ((cells != "nan") & (cells != "") & (cells != "None")).to_numpy()
+    cells = cells[played].str.replace(',', '.', regex=False)
+    col_pos = col_pos[played]
+    player_pos = player_pos[played]
+
+    # Attributs (* = Bonus x2, ! = Best Pick) puis nettoyage numérique
+    is_bonus = cells.str.contains('*', regex=False).to_numpy()
+    is_bp = cells.str.contains('!', regex=False).to_numpy()
+    clean = cells.str.replace('*', '', regex=False).str.replace('!', '', regex=False)
+    score_val = pd.to_numeric(clean, errors='coerce').to_numpy(dtype=float, copy=True)
+
+    # Score illisible -> ignoré
+    readable = np.isfinite(score_val)
+    score_val = score_val[readable]
+    is_bonus = is_bonus[readable]
+    is_bp = is_bp[readable]
+    col_pos = col_pos[readable]
+    player_pos = player_pos[readable]
+
+    final_score = np.where(is_bonus, score_val * 2, score_val)
+    row_picks = picks[col_pos]
+
+    # 3. DATES & MOIS : calculés une fois par pick puis diffusés
+    unique_picks = np.unique(row_picks)
+    season_start = season_start or SEASON_START_DATE
+    date_by_pick = {p: season_start + datetime.timedelta(days=int(p) - 1) for p in unique_picks}
+    month_by_pick = {p: normalize_month(d.strftime("%B")) for p, d in date_by_pick.items()}
+    pick_series = pd.Series(row_picks)
+
+    df = pd.DataFrame({
+        'Pick': row_picks,
+        'Deck': decks[col_pos],
+        'Date': pd.to_datetime(pick_series.map(date_by_pick)),
+        'Player': np.asarray(players, dtype=object)[player_pos],
+        'Score': np.trunc(final_score).astype(np.int64),
+        'ScoreVal': np.trunc(score_val).astype(np.int64),
+        'IsBonus': is_bonus,
+        'IsBP': is_bp,
+        'Month': pick_series.map(month_by_pick).to_numpy(dtype=object)
+    })
+    df = compact_frame(df)
+
+    df.attrs['deck_tracks'] = deck_tracks
+    return df
+
+
+def compact_frame(df):
+    """
+    Applique SCHEMA (à refaire après un concat : des catégories différentes
+    redonnent des objets) et garantit l'ordre par Pick (tri stable) : les
+    périodes sont ensuite des tranches sans copie (aggregates.pick_slice).
+    """
+    dtypes = {c: t for c, t in SCHEMA.items() if c in df.columns and str(df[c].dtype) != t}
+    if dtypes:
+        df = df.astype(dtypes)
+    if 'Pick' in df.columns and not df['Pick'].is_monotonic_increasing:
+        df = df.sort_values('Pick', kind='stable', ignore_index=True)
+    return df
+
+
+def _header_rows(df_raw, initial_deck=0):
+    """Ligne Pick (float, NaN si vide) et ligne Deck forward-fillée, colonnes 1..n."""
+    pick_row_idx, deck_row_idx, _, _ = locate_layout(df_raw)
+    pick_nums = _to_number(df_raw.iloc[pick_row_idx, 1:].to_numpy(dtype=object))
+    deck_nums = _to_number(df_raw.iloc[deck_row_idx, 1:].to_numpy(dtype=object))
+    deck_nums = np.trunc(pd.Series(deck_nums).ffill().fillna(initial_deck).to_numpy()).astype(np.int64)
+    return pick_nums, deck_nums
+
+
+def _compute_watermark(df_raw, df, initial_deck=0, col_offset=0):
+    """
+    Watermark = dernière colonne (index absolu dans l'onglet) contenant au moins
+    un score, + la colonne de reprise (avec OVERLAP_COLS de recouvrement) et le
+    Deck en cours juste avant cette colonne de reprise.
+    """
+    pick_nums, deck_nums = _header_rows(df_raw, initial_deck)
+    last_pick = int(df['Pick'].max())
+    rel_cols = np.flatnonzero(pick_nums == last_pick)
+    last_col = col_offset + 1 + int(rel_cols[-1])
+    start_col = max(1, last_col - OVERLAP_COLS + 1)
+    rel_before = start_col - 1 - col_offset - 1
+    if rel_before < -1:
+        # Le watermark a reculé avant la fenêtre lue : relecture complète
+        return None
+    deck_before = int(deck_nums[rel_before]) if rel_before >= 0 else initial_deck
+    return {'pick': last_pick, 'col': last_col, 'start_col': start_col, 'deck_before': deck_before}
+
+
+def _fingerprint(df_raw):
+    """
+    Empreinte du contenu brut (matrice de strings). Les cellules vides ('', 'nan',
+    'None') sont normalisées et les colonnes vides de fin ignorées : deux lectures
+    du même onglet donnent la même empreinte quel que soit le client.
+    """
+    cells = _as_text(df_raw.to_numpy(dtype=object).ravel())
+    cells = cells.mask(cells.isin(['nan', 'None']), '')
+    matrix = cells.to_numpy(dtype=object).reshape(df_raw.shape)
+    filled_cols = np.flatnonzero((matrix != '').any(axis=0))
+    matrix = matrix[:, :filled_cols[-1] + 1] if len(filled_cols) else matrix[:, :0]
+    # Une seule chaîne (séparateurs ASCII unité / ligne) : plus rapide qu'un hash par colonne
+    payload = '\x1e'.join('\x1f'.join(row) for row in matrix.tolist())
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _window_fingerprint(df_raw, watermark, n_rows, col_offset=0):
+    """
+    Empreinte de la fenêtre que relira le prochain refresh incrémental, calculée
+    sur la matrice déjà en main (colonne absolue c = index c - col_offset).
+    """
+    if watermark is None or watermark['start_col'] - col_offset < 1:
+        return None
+    window = slice_window(df_raw, watermark['start_col'] - col_offset, n_rows)
+    return {'start_col': watermark['start_col'], 'hash': _fingerprint(window)}
+
+
+def add_pick_features(df):
+    """
+    Features "transversales" de chaque score dans sa soirée (même pick), calculées
+    une fois à l'ingestion par opérations de groupe vectorisées :
+    ZScore, RankDesc (1 = meilleur), RankAsc (1 = pire), Percentile (% des scores
+    du soir <= au sien), IsDailyMax / IsDailyMin, GapToMean (écart à la moyenne du soir).
+    """
+    daily = df.groupby('Pick')['Score']
+    score = df['Score'].astype(float)
+    mean = daily.transform('mean')
+    std = daily.transform('std', ddof=0)
+    count = daily.transform('count')
+
+    df['ZScore'] = ((score - mean) / std.where(std > 0)).fillna(0)
+    df['RankDesc'] = daily.rank(ascending=False, method='min').astype('int16')
+    df['RankAsc'] = daily.rank(ascending=True, method='min').astype('int16')
+    df['Percentile'] = (daily.rank(method='max') / count * 100).astype('float32')
+    df['IsDailyMax'] = (df['Score'] == daily.transform('max')).to_numpy()
+    df['IsDailyMin'] = (df['Score'] == daily.transform('min')).to_numpy()
+    df['GapToMean'] = (score - mean).astype('float32')
+    return df
+
+
+def _pick_maps(df, table=None):
+    """BP déclarés (!) et score max par pick, pour un sous-ensemble de picks."""
+    bp_true = df[df['IsBP'] == True].set_index('Pick')['Score'].to_dict()
+    if table is None:
+        table = build_pick_table(df)
+    daily_max = {int(p): int(v) for p, v in table['Max'].items()}
+    return bp_true, daily_max
+
+
+# --- ÉTAT DU LOADER (PARTAGÉ ENTRE SESSIONS) ---
+# Résultat parsé complet, immuable : on remplace l'objet entier à chaque refresh
+# fingerprints : empreintes des lectures qui redonneraient exactement ce résultat
+# ('full' = onglet complet, 'window' = fenêtre incrémentale courante)
+# stats : StatsAccumulator de la saison complète (None = à reconstruire)
+# memo : {version des données: tableau matérialisé de stats} (une seule entrée)
+_Loaded = namedtuple('_Loaded', ['df', 'labels', 'n_rows', 'watermark', 'bp_true', 'daily_max_map', 'fingerprints', 'stats',
+                                 'memo'], defaults=(None, None))
+
+
+def _full_load(source, loaded=None):
+    """Lecture complète. Onglet inchangé (même empreinte) -> on rend `loaded` tel quel."""
+    df_raw = source.read()
+    fingerprint = _fingerprint(df_raw)
+    if loaded is not None and loaded.fingerprints.get('full') == fingerprint:
+        return loaded
+
+    df = parse_sheet(df_raw)
+    if df.empty:
+        return _Loaded(df, None, 0, None, {}, {}, {'full': fingerprint})
+    _, _, _, player_indices = locate_layout(df_raw)
+    n_rows = player_indices[-1] + 1
+    labels = pd.Series([str(v) for v in df_raw.iloc[:n_rows, 0]])
+    watermark = _compute_watermark(df_raw, df)
+    table = build_pick_table(df)
+    bp_true, daily_max_map = _pick_maps(df, table)
+    fingerprints = {'full': fingerprint, 'window': _window_fingerprint(df_raw, watermark, n_rows)}
+    df = add_pick_features(df)
+    attach_pick_table(df, table)
+    attach_range_index(df)
+
+    # Resynchro après des refresh incrémentaux (pas d'empreinte 'full') : si le
+    # parse redonne exactement la même chose, on garde les objets déjà servis
+    if (loaded is not None and 'full' not in loaded.fingerprints and not loaded.df.empty
+            and loaded.watermark == watermark and loaded.df.attrs.get('deck_tracks') == df.attrs['deck_tracks']
+            and 'pick_table' in loaded.df.attrs
+            and loaded.df.reset_index(drop=True).equals(df)):
+        return loaded._replace(fingerprints=fingerprints)
+
+    df.attrs['fingerprint'] = fingerprint
+    return _Loaded(df, labels, n_rows, watermark, bp_true, daily_max_map, fingerprints, StatsAccumulator.from_frame(df), {})
+
+
+def _same_players(cached, current):
+    """
+    Colonne A inchangée : mêmes libellés sur les lignes en cache et pas de
+    nouveau joueur juste après le bloc (ligne suivante = mot d'arrêt).
+    """
+    cached, current = _as_text(cached), _as_text(current)
+    cached = cached.mask(cached.isin(['nan', 'None']), '').to_numpy()
+    current = current.mask(current.isin(['nan', 'None']), '').to_numpy()
+    n = len(cached)
+    return len(current) > n and (current[:n] == cached).all() and current[n] in STOP_WORDS
+
+
+def _incremental_load(source, loaded):
+    """Relecture de la fenêtre après le watermark. Fenêtre inchangée -> `loaded` tel quel."""
+    wm = loaded.watermark
+    window = source.read(first_col=wm['start_col'], n_rows=loaded.n_rows)
+    window_fp = {'start_col': wm['start_col'], 'hash': _fingerprint(window)}
+    if loaded.fingerprints.get('window') == window_fp:
+        return loaded
+    if not _same_players(loaded.labels, source.read_labels(loaded.n_rows + 1)):
+        # Lignes joueurs insérées / supprimées / déplacées : la fenêtre ne
+        # s'aligne plus sur les libellés en cache, relecture complète
+        return _full_load(source)
+
+    df_raw = pd.concat([loaded.labels.rename(0), window], axis=1)
+    new_rows = parse_sheet(df_raw, initial_deck=wm['deck_before'])
+    if new_rows.empty:
+        # Plus aucun score dans la fenêtre (suppression) : relecture complète
+        return _full_load(source)
+
+    # Remplacement des picks relus (recouvrement inclus) puis ajout en fin de frame
+    old = loaded.df
+    header_picks, _ = _header_rows(df_raw, wm['deck_before'])
+    window_picks = set(np.trunc(header_picks[~np.isnan(header_picks)]).astype(int).tolist())
+    kept = old[~old['Pick'].isin(window_picks)]
+    new_rows = add_pick_features(new_rows)
+    df = compact_frame(pd.concat([kept, new_rows], ignore_index=True))
+
+    # Structure des Decks : on remplace les picks de la fenêtre
+    deck_tracks = {}
+    for d, picks in old.attrs.get('deck_tracks', {}).items():
+        kept_picks = [p for p in picks if p not in window_picks]
+        if kept_picks:
+            deck_tracks[d] = kept_picks
+    for d, picks in new_rows.attrs.get('deck_tracks', {}).items():
+        deck_tracks.setdefault(d, []).extend(picks)
+    df.attrs['deck_tracks'] = deck_tracks
+
+    # Agrégats annexes mis à jour pour les seuls picks de la fenêtre
+    new_table = build_pick_table(new_rows)
+    attach_pick_table(df, update_pick_table(attached_pick_table(old), new_table, window_picks))
+    attach_range_index(df)
+    bp_new, max_new = _pick_maps(new_rows, new_table)
+    bp_true = {p: v for p, v in loaded.bp_true.items() if p not in window_picks}
+    bp_true.update(bp_new)
+    daily_max_map = {p: v for p, v in loaded.daily_max_map.items() if p not in window_picks}
+    daily_max_map.update(max_new)
+
+    watermark = _compute_watermark(
+        df_raw, new_rows, initial_deck=wm['deck_before'], col_offset=wm['start_col'] - 1
+    )
+
+    # Version chaînée (empreinte précédente + fenêtre) ; l'empreinte 'full' ne
+    # décrit plus le résultat, elle sera recalculée à la prochaine relecture complète
+    df.attrs['fingerprint'] = hashlib.blake2b(
+        (old.attrs.get('fingerprint', '') + window_fp['hash']).encode(), digest_size=16
+    ).hexdigest()
+    fingerprints = {'window': _window_fingerprint(df_raw, watermark, loaded.n_rows, col_offset=wm['start_col'] - 1)}
+    return loaded._replace(df=df, watermark=watermark, bp_true=bp_true, daily_max_map=daily_max_map,
+                           fingerprints=fingerprints, stats=_advance_stats(loaded, old, new_rows, window_picks, df))
+
+
+# Colonnes qui déterminent les stats d'un pick (features par pick incluses)
+_STATS_COLS = ['Pick', 'Player', 'Score', 'ScoreVal', 'IsBonus', 'IsBP', 'Month']
+
+
+def _advance_stats(loaded, old, new_rows, window_picks, df):
+    """
+    Stats de saison après un refresh incrémental : si les picks déjà absorbés de
+    la fenêtre (recouvrement) n'ont pas bougé, on n'absorbe que les nouveaux
+    picks ; sinon (correction tardive) reconstruction complète.
+    """
+    acc = loaded.stats
+    if acc is None:
+        return StatsAccumulator.from_frame(df)
+    before = old[old['Pick'].isin(window_picks)].sort_values(['Pick', 'Player'])[_STATS_COLS]
+    after = new_rows[new_rows['Pick'] <= acc.last_pick].sort_values(['Pick', 'Player'])[_STATS_COLS]
+    if not before.reset_index(drop=True).astype(object).equals(after.reset_index(drop=True).astype(object)):
+        return StatsAccumulator.from_frame(df)
+    fresh = new_rows[new_rows['Pick'] > acc.last_pick]
+    if fresh.empty:
+        return acc
+    acc = acc.copy()
+    for _, pick_rows in fresh.groupby('Pick', sort=True):
+        acc.absorb(pick_rows)
+    return acc
+
+
+def _loaded_to_snapshot(loaded):
+    meta = {
+        'labels': loaded.labels.tolist() if loaded.labels is not None else None,
+        'n_rows': loaded.n_rows,
+        'watermark': loaded.watermark,
+        'deck_tracks': loaded.df.attrs.get('deck_tracks', {}),
+        'bp_true': loaded.bp_true,
+        'daily_max_map': loaded.daily_max_map,
+        'fingerprints': loaded.fingerprints,
+        'fingerprint': loaded.df.attrs.get('fingerprint'),
+        'season': SEASON_ID,
+    }
+    return loaded.df, meta
+
+
+def _loaded_from_snapshot(df, meta):
+    df = compact_frame(df)
+    if 'GapToMean' not in df.columns:
+        # Snapshot antérieur aux features par pick
+        df = add_pick_features(df)
+    df.attrs['deck_tracks'] = meta['deck_tracks']
+    attach_pick_table(df, build_pick_table(df))
+    attach_range_index(df)
+    if meta.get('fingerprint'):
+        df.attrs['fingerprint'] = meta['fingerprint']
+    labels = pd.Series(meta['labels']) if meta['labels'] is not None else None
+    return _Loaded(df, labels, meta['n_rows'], meta['watermark'], meta['bp_true'], meta['daily_max_map'],
+                   meta.get('fingerprints') or {}, StatsAccumulator.from_frame(df) if not df.empty else None, {})
+
+
+class _LoaderState:
+    """
+    Dernier résultat parsé + watermark, pour ne relire que les nouveaux picks.
+    Chaque lecture réussie est aussi écrite sur disque (snapshot) : au démarrage
+    on sert le snapshot immédiatement et on rafraîchit en tâche de fond ; si
+    Sheets tombe, on continue de servir la dernière version connue (stale).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()           # Protège le swap de self.loaded
+        self.refresh_lock = threading.Lock()   # Un seul refresh à la fois
+        self.loaded = None
+        self.fetched_at = 0.0
+        self.refresh_count = 0
+        self.stale = False
+        self.as_of = None                      # Datetime de la dernière lecture réussie
+        self.error = None
+        self.revalidating = False              # Un refresh de fond est en cours
+        self.forced = False                    # Actualisation demandée : lecture sans cache source
+
+    def is_expired(self, ttl=REFRESH_TTL):
+        return time.time() - self.fetched_at > ttl
+
+    def expire(self, forced=False):
+        self.fetched_at = 0.0
+        self.forced = self.forced or forced
+
+    def result(self):
+        """Tuple historique de load_data()."""
+        loaded = self.loaded
+        if loaded is None or loaded.df.empty:
             return pd.DataFrame(), 0, {}, [], {}
+        # Fallback si les "!" ne sont pas détectés
+        bp_map = loaded.bp_true if loaded.bp_true else dict(loaded.daily_max_map)
+        # Objets annexes (Placeholders simplifiés pour éviter les erreurs de référence)
+        team_rank = 1
+        team_history = [1]
+        return loaded.df, team_rank, bp_map, team_history, loaded.daily_max_map
 
-        # 4. EXTRACTION DES DONNÉES
-        data_list = []
-        
-        # --- MAP DES DECKS (Gestion des trous) ---
-        deck_map = {}
-        # --- AJOUT 1 : Variable pour stocker la structure théorique ---
-        deck_tracks = {} 
-        # --------------------------------------------------------------
-        current_deck = 0
-        
-        # On parcourt la ligne des Decks pour construire la carte
-        for col_idx in range(1, df_raw.shape[1]):
-            val = df_raw.iloc[deck_row_idx, col_idx]
-            # Si on a une valeur (ex: "1" ou "1.0"), on met à jour le deck courant
-            if pd.notna(val) and val != "nan" and val.strip() != "":
-                try:
-                    current_deck = int(float(val.replace(',', '.')))
-                except: pass
-            deck_map[col_idx] = current_deck
-
-            # --- AJOUT 2 : Mémorisation des Picks prévus pour chaque Deck ---
-            # On regarde la ligne "Pick" pour voir s'il y a un numéro prévu
-            raw_pick_struct = df_raw.iloc[pick_row_idx, col_idx]
-            if pd.notna(raw_pick_struct) and raw_pick_struct != "nan" and raw_pick_struct.strip() != "":
-                try:
-                    p_num = int(float(raw_pick_struct.replace(',', '.')))
-                    if current_deck > 0:
-                        if current_deck not in deck_tracks:
-                            deck_tracks[current_deck] = []
-                        deck_tracks[current_deck].append(p_num)
-                except: pass
-            # ------------------------------------------------------------------
-
-        # --- PARCOURS DES PICKS (Lecture des scores) ---
-        for col_idx in range(1, df_raw.shape[1]):
-            # Lecture du Pick
-            raw_pick = df_raw.iloc[pick_row_idx, col_idx]
-            
-            if pd.isna(raw_pick) or raw_pick == "nan" or raw_pick.strip() == "":
-                continue
-            
+    def restore_snapshot(self, name):
+        df, meta = snapshot.load_snapshot(name)
+        if df is None:
+            return False
+        season = meta.get('season', SEASON_ID)
+        if season != SEASON_ID:
+            # Snapshot d'une saison terminée : on l'archive, on ne le sert pas
+            if not archive.has_partition(season):
+                archive.save_partition(season, _loaded_from_snapshot(df, meta).df)
+            return False
+        with self.lock:
+            self.loaded = _loaded_from_snapshot(df, meta)
+            self.as_of = datetime.datetime.fromtimestamp(meta['saved_at'])
+            self.stale = True
+            # Le snapshot compte comme frais pour le TTL : on le sert tel quel
+            self.fetched_at = time.time()
+        return True
+
+    def refresh(self, source, force=False):
+        """Lecture de la source (complète ou incrémentale) puis swap atomique."""
+        with self.refresh_lock:
+            # Un autre thread vient peut-être de rafraîchir pendant l'attente
+            if not force and self.loaded is not None and not self.is_expired():
+                return
+            if self.forced:
+                # Actualisation manuelle : on contourne le cache de lecture de la source
+                source, self.forced = source.uncached(), False
+            loaded = self.loaded
+            needs_full = (
+                loaded is None or loaded.df.empty or loaded.watermark is None
+                or self.refresh_count % FULL_RESYNC_EVERY == 0
+            )
             try:
-                pick_num = int(float(raw_pick.replace(',', '.')))
-            except:
-                continue # Colonne invalide
-
-            # Récupération Deck & Calcul Date
-            deck_num = deck_map.get(col_idx, 0)
-            calc_date = SEASON_START_DATE + datetime.timedelta(days=pick_num - 1)
-
-            # Lecture des scores joueurs
-            for player_name, row_idx in zip(players, player_indices):
-                raw_score = df_raw.iloc[row_idx, col_idx]
-                
-                # Si vide -> DNP
-                if pd.isna(raw_score) or raw_score == "nan" or raw_score.strip() == "":
-                    continue
-                
-                score_str = raw_score.strip().replace(',', '.')
-                
-                # Attributs
-                is_bonus = '*' in score_str
-                is_bp = '!' in score_str
-                
-                # Nettoyage pour valeur numérique
-                clean_str = score_str.replace('*', '').replace('!', '')
-                
+                new = _full_load(source, loaded) if needs_full else _incremental_load(source, loaded)
+            except Exception as e:
+                with self.lock:
+                    self.error = str(e)
+                    self.fetched_at = time.time()
+                    if self.loaded is not None:
+                        self.stale = True
+                        # On repartira d'une relecture complète au prochain essai
+                        self.refresh_count = 0
+                raise
+
+            with self.lock:
+                self.loaded = new
+                self.refresh_count += 1
+                self.fetched_at = time.time()
+                self.as_of = datetime.datetime.now()
+                self.stale = False
+                self.error = None
+
+            # Écriture sous refresh_lock : snapshots écrits dans l'ordre des refresh,
+            # jamais deux à la fois. Contenu inchangé : snapshot disque déjà à jour
+            if new is not loaded and not new.df.empty:
                 try:
-                    score_val = float(clean_str)
-                except:
-                    continue # Score illisible
-                
-                # Calcul Score Final
-                final_score = score_val * 2 if is_bonus else score_val
-                
-                data_list.append({
-                    'Pick': pick_num,
-                    'Deck': deck_num,
-                    'Date': calc_date,
-                    'Player': player_name,
-                    'Score': int(final_score),
-                    'ScoreVal': int(score_val),
-                    'IsBonus': is_bonus,
-                    'IsBP': is_bp,
-                    'Month': normalize_month(calc_date.strftime("%B"))
-                })
-
-        # 5. DATAFRAME FINAL
-        df = pd.DataFrame(data_list)
-        
-        if df.empty:
-            return pd.DataFrame(), 0, {}, [], {}
+                    snapshot.save_snapshot(*_loaded_to_snapshot(new), name=source.snapshot_name)
+                except Exception as e:
+                    with self.lock:
+                        self.error = f"Snapshot : {e}"
 
-        # --- AJOUT 3 : On attache la structure au DataFrame ---
-        df.attrs['deck_tracks'] = deck_tracks
-        # ------------------------------------------------------
+    def refresh_in_background(self, source, force=True):
+        """Lance un seul thread de refresh à la fois ; les appels suivants ne font rien."""
+        with self.lock:
+            if self.revalidating:
+                return
+            self.revalidating = True
 
-        # 6. CALCULS STATS (Z-Score, etc.)
-        df['ZScore'] = df.groupby('Pick')['Score'].transform(
-            lambda x: (x - x.mean()) / x.std(ddof=0) if x.std(ddof=0) > 0 else 0
-        ).fillna(0)
+        def _run():
+            try:
+                self.refresh(source, force=force)
+            except Exception:
+                pass  # L'erreur est conservée dans self.error, on garde le stale
+            finally:
+                self.revalidating = False
 
-        # Objets annexes (Placeholders simplifiés pour éviter les erreurs de référence)
-        team_rank = 1 
-        # On essaie de récupérer les BP depuis les données extraites
-        bp_map = df[df['IsBP'] == True].set_index('Pick')['Score'].to_dict()
-        if not bp_map: # Fallback si les "!" ne sont pas détectés
-             bp_map = df.groupby('Pick')['Score'].max().to_dict()
-             
-        team_history = [1]
-        daily_max_map = df.groupby('Pick')['Score'].max().to_dict()
+        threading.Thread(target=_run, daemon=True).start()
+
+    def status(self):
+        return {'stale': self.stale, 'as_of': self.as_of, 'error': self.error}
+
+
+@st.cache_resource(show_spinner=False)
+def _get_loader_state(source_name):
+    return _LoaderState()
+
+
+def refresh_data():
+    """Force une relecture (incrémentale, bloquante, sans cache source) au prochain load_data()."""
+    _get_loader_state(get_data_source(REFRESH_TTL).snapshot_name).expire(forced=True)
+
+
+def get_season_stats(df):
+    """
+    Tableau compute_stats de la saison complète, tenu à jour pick par pick par
+    le loader. None si df n'est pas la frame servie (ou accumulateur absent).
+    Matérialisé une fois par version des données (lecture seule).
+    """
+    loaded = _get_loader_state(get_data_source(REFRESH_TTL).snapshot_name).loaded
+    if loaded is None or loaded.df is not df or loaded.stats is None:
+        return None
+    version = (df.attrs.get('fingerprint'), loaded.stats)
+    frame = loaded.memo.get(version)
+    if frame is None:
+        frame = loaded.stats.to_frame()
+        loaded.memo.clear()
+        loaded.memo[version] = frame
+    return frame
+
+
+def get_data_status():
+    """Fraîcheur des données servies : {'stale', 'as_of', 'error'}."""
+    return _get_loader_state(get_data_source(REFRESH_TTL).snapshot_name).status()
+
+
+def load_data():
+    state = None
+    try:
+        # Source choisie par config / DINO_DATA_SOURCE (Google Sheets ou fichier local)
+        source = get_data_source(REFRESH_TTL)
+        state = _get_loader_state(source.snapshot_name)
+
+        # Démarrage à froid : snapshot disque immédiat + refresh en arrière-plan
+        if state.loaded is None and state.restore_snapshot(source.snapshot_name):
+            state.refresh_in_background(source)
 
-        return df, team_rank, bp_map, team_history, daily_max_map
+        if state.loaded is None or state.is_expired(HARD_TTL):
+            # Rien à servir, ou données trop vieilles : lecture bloquante
+            state.refresh(source)
+        elif state.is_expired():
+            # Stale-while-revalidate : réponse immédiate, relecture en arrière-plan
+            state.refresh_in_background(source, force=False)
+        return state.result()
 
     except Exception as e:
+        if state is not None and state.loaded is not None:
+            # Source indisponible : on sert la dernière version connue (badge stale)
+            return state.result()
         st.error(f"🔥 Erreur Data Loader : {str(e)}")
         return pd.DataFrame(), 0, {}, [], {}
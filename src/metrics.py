@@ -0,0 +1,474 @@
+import numpy as np
+import pandas as pd
+from src.streaks import segment_streaks
+from src.aggregates import pick_table, window_sums
+from src.rolling import rolling_form, BY_PICK, BY_GAMES
+from src.cube import rollup
+from src.cache import cache_by_version
+
+# --- REGISTRE DE MÉTRIQUES (CALCUL PARESSEUX) ---
+# Chaque métrique (= colonne de compute_stats) déclare ses entrées et un noyau
+# vectorisé. Les entrées sont d'autres métriques ou des intermédiaires partagés
+# (table triée joueur/pick, segments, compteurs...). Un MetricContext calcule à
+# la demande et mémorise chaque valeur : une page ne paie que les colonnes
+# qu'elle affiche, et les intermédiaires ne sont calculés qu'une fois par
+# version des données (contexte mis en cache par metric_context).
+
+_REGISTRY = {}      # nom -> (entrées, noyau)
+METRICS = []        # Colonnes publiques, dans l'ordre historique de compute_stats
+
+
+def _register(name, inputs, public):
+    def decorator(kernel):
+        _REGISTRY[name] = (inputs, kernel)
+        if public:
+            METRICS.append(name)
+        return kernel
+    return decorator
+
+
+def intermediate(name, *inputs):
+    """Valeur partagée entre métriques (non exportée)."""
+    return _register(name, inputs, public=False)
+
+
+def metric(name, *inputs):
+    """Colonne du tableau de stats (une valeur par joueur, ordre d'apparition)."""
+    return _register(name, inputs, public=True)
+
+
+class MetricContext:
+    """Valeurs calculées à la demande pour une frame (df + maps), mémorisées."""
+
+    def __init__(self, df, bp_map, daily_max_map):
+        self._values = {'df': df, 'bp_map': bp_map, 'daily_max_map': daily_max_map}
+
+    def get(self, name):
+        if name not in self._values:
+            inputs, kernel = _REGISTRY[name]
+            self._values[name] = kernel(*[self.get(i) for i in inputs])
+        return self._values[name]
+
+    def frame(self, names=None):
+        """Tableau Player + métriques demandées (toutes par défaut, ordre historique)."""
+        if self.get('df').empty:
+            return pd.DataFrame()
+        names = METRICS if names is None else [n for n in METRICS if n in set(names)]
+        return pd.DataFrame({'Player': self.get('player_names'), **{n: self.get(n) for n in names}})
+
+
+@cache_by_version(max_entries=16)
+def metric_context(df, bp_map, daily_max_map):
+    return MetricContext(df, bp_map, daily_max_map)
+
+
+def _segment_max(values, starts):
+    return np.maximum.reduceat(values, starts)
+
+
+# --- INTERMÉDIAIRES : TABLE TRIÉE (JOUEUR, PICK) ---
+# Joueurs numérotés dans leur ordre d'apparition (= ordre de sortie)
+
+@intermediate('factorized', 'df')
+def _factorized(df):
+    return pd.factorize(df['Player'])
+
+
+@intermediate('player_names', 'factorized')
+def _player_names(factorized):
+    return np.asarray(factorized[1], dtype=object)
+
+
+@intermediate('order', 'df', 'factorized')
+def _order(df, factorized):
+    return np.lexsort((df['Pick'].to_numpy(), factorized[0]))
+
+
+@intermediate('pid', 'factorized', 'order')
+def _pid(factorized, order):
+    return factorized[0][order]
+
+
+@intermediate('n_players', 'player_names')
+def _n_players(player_names):
+    return len(player_names)
+
+
+def _column(name, dtype=None):
+    def kernel(df, order):
+        values = df[name].to_numpy()[order]
+        return values.astype(dtype) if dtype is not None else values
+    return kernel
+
+
+intermediate('scores', 'df', 'order')(_column('Score', np.int64))
+intermediate('scores_raw', 'df', 'order')(_column('ScoreVal', np.int64))
+intermediate('picks', 'df', 'order')(_column('Pick'))
+intermediate('bonuses', 'df', 'order')(_column('IsBonus'))
+intermediate('is_bp', 'df', 'order')(_column('IsBP'))
+intermediate('ranks_desc', 'df', 'order')(_column('RankDesc'))
+intermediate('ranks_asc', 'df', 'order')(_column('RankAsc'))
+intermediate('gap_to_mean', 'df', 'order')(_column('GapToMean'))
+
+
+@intermediate('starts', 'pid')
+def _starts(pid):
+    return np.flatnonzero(np.r_[True, pid[1:] != pid[:-1]])
+
+
+@intermediate('ends', 'starts', 'pid')
+def _ends(starts, pid):
+    return np.r_[starts[1:], len(pid)]
+
+
+@intermediate('pos_in_player', 'pid', 'starts')
+def _pos_in_player(pid, starts):
+    return np.arange(len(pid)) - starts[pid]
+
+
+@intermediate('by_player', 'df', 'order', 'pid', 'scores', 'scores_raw')
+def _by_player(df, order, pid, scores, scores_raw):
+    return pd.DataFrame({
+        'pid': pid, 'Score': scores, 'ScoreVal': scores_raw,
+        'Month': df['Month'].to_numpy()[order], 'ZScore': df['ZScore'].to_numpy()[order],
+    })
+
+
+@intermediate('player_groups', 'by_player')
+def _player_groups(frame):
+    return frame.groupby('pid', sort=True)
+
+
+@intermediate('team', 'df')
+def _team(df):
+    # Agrégats d'équipe par pick (table du loader si df en est une tranche)
+    return pick_table(df)
+
+
+@intermediate('window_sums', 'df', 'player_names')
+def _window_sums(df, player_names):
+    # Totaux et comptes additifs (index de fenêtres du loader si df en est une tranche)
+    return window_sums(df).reindex(player_names)
+
+
+def _window_column(name):
+    def kernel(sums):
+        return sums[name].to_numpy()
+    return kernel
+
+
+@intermediate('rolling', 'df')
+def _rolling(df):
+    # Formes glissantes (N derniers matchs / N derniers picks), une passe par version
+    return rolling_form(df)
+
+
+# Comptes / sommes / moyennes par joueur (bincount sur pid)
+def _count(pid, n, mask):
+    return np.bincount(pid, weights=mask, minlength=n).astype(np.int64)
+
+
+def _total(pid, n, values, mask=None):
+    w = values if mask is None else np.where(mask, values, 0)
+    return np.bincount(pid, weights=w, minlength=n)
+
+
+def _mean_or(pid, n, values, mask, default):
+    k = _count(pid, n, mask)
+    out = np.full(n, default, dtype=float)
+    np.divide(_total(pid, n, values, mask), k, out=out, where=k > 0)
+    return out
+
+
+def _counter(condition):
+    """Métrique 'nombre de matchs où condition(scores)'."""
+    def kernel(pid, n_players, scores):
+        return _count(pid, n_players, condition(scores))
+    return kernel
+
+
+# --- 1. METRIQUES CLASSIQUES ---
+
+metric('Games', 'window_sums')(_window_column('Games'))
+metric('Total', 'window_sums')(_window_column('Total'))
+
+
+@metric('Moyenne', 'Total', 'Games')
+def _moyenne(total, games):
+    return total / games
+
+
+@metric('Moyenne_Raw', 'IronLungs', 'Games')
+def _moyenne_raw(iron_lungs, games):
+    return iron_lungs / games
+
+
+@metric('StdDev', 'player_groups')
+def _std_dev(groups):
+    return groups['Score'].std(ddof=0).to_numpy()
+
+
+@metric('Best', 'scores', 'starts')
+def _best(scores, starts):
+    return _segment_max(scores, starts)
+
+
+@metric('Best_Raw', 'scores_raw', 'starts')
+def _best_raw(scores_raw, starts):
+    return _segment_max(scores_raw, starts)
+
+
+@metric('Worst', 'scores', 'starts')
+def _worst(scores, starts):
+    return np.minimum.reduceat(scores, starts)
+
+
+@metric('Worst_Raw', 'scores_raw', 'starts')
+def _worst_raw(scores_raw, starts):
+    return np.minimum.reduceat(scores_raw, starts)
+
+
+@metric('Last', 'scores', 'ends')
+def _last(scores, ends):
+    return scores[ends - 1]
+
+
+@metric('LastIsBonus', 'bonuses', 'ends')
+def _last_is_bonus(bonuses, ends):
+    return bonuses[ends - 1]
+
+
+# Formes récentes : N derniers matchs du joueur / N derniers picks de la période
+@metric('Last5', 'rolling')
+def _last5(rolling):
+    return rolling.last_mean(5, BY_GAMES)
+
+
+@intermediate('avg_last_7', 'rolling')
+def _avg_last_7(rolling):
+    return rolling.last_mean(7, BY_GAMES)
+
+
+def _pick_form(n_picks):
+    # Sans match sur la fenêtre : moyenne de la période
+    def kernel(rolling, moyenne):
+        recent = rolling.last_mean(n_picks, BY_PICK)
+        return np.where(np.isnan(recent), moyenne, recent)
+    return kernel
+
+
+metric('Last10', 'rolling', 'Moyenne')(_pick_form(10))
+metric('Last15', 'rolling', 'Moyenne')(_pick_form(15))
+
+# Counts
+metric('Count30', 'window_sums')(_window_column('Count30'))
+metric('Count40', 'window_sums')(_window_column('Count40'))
+metric('Count35', 'pid', 'n_players', 'scores')(_counter(lambda s: s > 35))
+metric('Count2030', 'pid', 'n_players', 'scores')(_counter(lambda s: (s >= 20) & (s <= 30)))
+metric('Carottes', 'window_sums')(_window_column('Carottes'))
+metric('Nukes', 'window_sums')(_window_column('Nukes'))
+metric('BP_Count', 'window_sums')(_window_column('BP_Count'))
+
+
+@metric('Alpha_Count', 'pid', 'n_players', 'scores', 'picks', 'daily_max_map')
+def _alpha_count(pid, n_players, scores, picks, daily_max_map):
+    daily_max = pd.Series(picks).map(daily_max_map).to_numpy(dtype=float)
+    return _count(pid, n_players, (scores >= daily_max) & (scores > 0))
+
+
+# --- 2. SÉRIES (run-length par segment) ---
+
+@intermediate('no_carrot_streaks', 'scores', 'starts', 'ends')
+def _no_carrot_streaks(scores, starts, ends):
+    return segment_streaks(scores >= 20, starts, ends)
+
+
+@metric('MaxUnstoppable', 'scores', 'starts', 'ends')
+def _max_unstoppable(scores, starts, ends):
+    return segment_streaks(scores >= 40, starts, ends)[1]
+
+
+# --- 3. LOGIQUES SPÉCIFIQUES HOF ---
+
+@metric('PrimeTime', 'df', 'player_names')
+def _prime_time(df, player_names):
+    # Meilleure moyenne mensuelle (cube Mois x Joueur)
+    monthly = rollup(df, 'Month')['Moyenne']
+    return monthly.groupby(level='Player', observed=True).max().reindex(player_names).to_numpy()
+
+
+metric('IronLungs', 'window_sums')(_window_column('TotalRaw'))
+
+
+metric('SixthMan', 'pid', 'n_players', 'scores')(_counter(lambda s: (s >= 30) & (s < 40)))
+
+
+@metric('Medalist', 'pid', 'n_players', 'ranks_desc')
+def _medalist(pid, n_players, ranks_desc):
+    return _count(pid, n_players, ranks_desc <= 3)
+
+
+@metric('ShieldCount', 'pid', 'n_players', 'ranks_asc')
+def _shield_count(pid, n_players, ranks_asc):
+    return _count(pid, n_players, ranks_asc == 1)
+
+
+@metric('Dominator', 'pid', 'n_players', 'gap_to_mean')
+def _dominator(pid, n_players, gap_to_mean):
+    return _count(pid, n_players, gap_to_mean > 0)
+
+
+@metric('SaviorScore', 'team', 'pid', 'n_players', 'scores', 'picks')
+def _savior_score(team, pid, n_players, scores, picks):
+    # "Pire soir" de l'équipe : score de chacun ce soir-là
+    worst_night_pick = team['Total'].idxmin() if not team.empty else -1
+    savior_rows = picks == worst_night_pick
+    savior_val = np.zeros(n_players, dtype=np.int64)
+    savior_val[pid[savior_rows][::-1]] = scores[savior_rows][::-1]  # 1er score du soir
+    return savior_val
+
+
+@metric('Soloist', 'team', 'pid', 'n_players', 'scores', 'picks')
+def _soloist(team, pid, n_players, scores, picks):
+    # Soirs où un SEUL joueur a dépassé 40
+    soloist_picks = team.index[team['Over40'] == 1]
+    return _count(pid, n_players, np.isin(picks, soloist_picks) & (scores > 40))
+
+
+@metric('Ghost', 'pid', 'n_players', 'scores', 'ranks_desc')
+def _ghost(pid, n_players, scores, ranks_desc):
+    return _count(pid, n_players, (scores > 35) & (ranks_desc > 1))
+
+
+@metric('Braqueur', 'scores', 'is_bp', 'starts')
+def _braqueur(scores, is_bp, starts):
+    return np.minimum.reduceat(np.where(is_bp, scores, 999), starts)
+
+
+@metric('BadLuck', 'scores_raw', 'is_bp', 'starts')
+def _bad_luck(scores_raw, is_bp, starts):
+    # CORRECTION BAD LUCK : Score BRUT max sans BP (0 si tous les picks sont des BP)
+    has_plain = np.add.reduceat((~is_bp).astype(np.int64), starts) > 0
+    return np.where(has_plain, _segment_max(np.where(is_bp, np.iinfo(np.int64).min, scores_raw), starts), 0)
+
+
+@metric('MaxDeck', 'rolling', 'Games')
+def _max_deck(rolling, games):
+    # Meilleur Deck : meilleure somme glissante sur 7 matchs
+    deck_score = rolling.best(7, BY_GAMES)
+    return deck_score.astype(float) if (games >= 7).any() else deck_score
+
+
+@metric('MaxPhoenix', 'scores', 'starts', 'pos_in_player')
+def _max_phoenix(scores, starts, pos_in_player):
+    # Phoenix : meilleur score juste après une carotte
+    prev_is_carrot = np.r_[False, scores[:-1] < 20] & (pos_in_player > 0)
+    return _segment_max(np.where(prev_is_carrot, scores, 0), starts)
+
+
+@metric('CurrentNoCarrot', 'no_carrot_streaks')
+def _current_no_carrot(streaks):
+    return streaks[0]
+
+
+@metric('MaxNoCarrot', 'no_carrot_streaks')
+def _max_no_carrot(streaks):
+    return streaks[1]
+
+
+@metric('MaxAlien', 'scores', 'starts', 'ends')
+def _max_alien(scores, starts, ends):
+    return segment_streaks(scores >= 60, starts, ends)[1]
+
+
+# --- 4. CONTEXTE (BONUS, FORME, RÉGULARITÉ) ---
+
+@metric('Bonus_Gained', 'pid', 'n_players', 'scores', 'scores_raw', 'bonuses')
+def _bonus_gained(pid, n_players, scores, scores_raw, bonuses):
+    return _total(pid, n_players, scores - scores_raw, bonuses).astype(np.int64)
+
+
+@metric('Best_Bonus', 'scores', 'bonuses', 'starts', 'BonusPlayed')
+def _best_bonus(scores, bonuses, starts, bonus_played):
+    return np.where(bonus_played > 0, _segment_max(np.where(bonuses, scores, np.iinfo(np.int64).min), starts), 0)
+
+
+@metric('Worst_Bonus', 'scores', 'bonuses', 'starts', 'BonusPlayed')
+def _worst_bonus(scores, bonuses, starts, bonus_played):
+    return np.where(bonus_played > 0, np.minimum.reduceat(np.where(bonuses, scores, np.iinfo(np.int64).max), starts), 0)
+
+
+@metric('Avg_Bonus', 'AvgWithBonus')
+def _avg_bonus(avg_with_bonus):
+    return avg_with_bonus
+
+
+@metric('Momentum', 'Last5', 'Moyenne')
+def _momentum(last5, moyenne):
+    return last5 - moyenne
+
+
+@metric('ProgressionPct', 'Last15', 'Moyenne')
+def _progression_pct(l15_avg, moyenne):
+    return np.where(moyenne > 0, (l15_avg - moyenne) / np.where(moyenne > 0, moyenne, 1) * 100, 0)
+
+
+@metric('ReliabilityPct', 'Games', 'Carottes')
+def _reliability_pct(games, carrots):
+    return (games - carrots) / games * 100
+
+
+@metric('AvgZ', 'player_groups')
+def _avg_z(groups):
+    return groups['ZScore'].mean().to_numpy()
+
+
+@metric('Trend', 'rolling')
+def _trend(rolling):
+    # Trend : 20 derniers scores
+    return rolling.recent(20)
+
+
+@metric('AvgWithBonus', 'pid', 'n_players', 'scores', 'bonuses')
+def _avg_with_bonus(pid, n_players, scores, bonuses):
+    return _mean_or(pid, n_players, scores, bonuses, 0)
+
+
+@metric('AvgWithoutBonus', 'pid', 'n_players', 'scores', 'bonuses')
+def _avg_without_bonus(pid, n_players, scores, bonuses):
+    return _mean_or(pid, n_players, scores, ~bonuses, 0)
+
+
+@metric('BonusPlayed', 'pid', 'n_players', 'bonuses')
+def _bonus_played(pid, n_players, bonuses):
+    return _count(pid, n_players, bonuses)
+
+
+@intermediate('mode', 'by_player')
+def _mode(frame):
+    # Score le plus fréquent (le plus petit en cas d'égalité, comme np.unique)
+    return (
+        frame.groupby(['pid', 'Score']).size().rename('n').reset_index()
+        .sort_values(['pid', 'n', 'Score'], ascending=[True, False, True], kind='stable')
+        .drop_duplicates('pid').set_index('pid')
+    )
+
+
+@metric('ModeScore', 'mode')
+def _mode_score(mode):
+    return mode['Score'].to_numpy()
+
+
+@metric('ModeCount', 'mode')
+def _mode_count(mode):
+    return mode['n'].to_numpy()
+
+
+@metric('Spread', 'Best', 'Worst')
+def _spread(best, worst):
+    return best - worst
+
+
+@metric('Trend7Icon', 'avg_last_7', 'Moyenne')
+def _trend7_icon(avg_last_7, moyenne):
+    return np.where(avg_last_7 - moyenne >= 1, "↗️", np.where(avg_last_7 - moyenne <= -1, "↘️", "➡️"))
@@ -0,0 +1,123 @@
+import os
+import numpy as np
+import pandas as pd
+from src.config import SEASONS_CONFIG
+from src.rolling import rolling_form
+from src.cache import cache_by_version, process_pool
+
+# --- PROBABILITÉS DE TITRE (MONTE CARLO) ---
+# Chaque simulation rejoue les picks restants de la saison : pour chaque joueur
+# et chaque pick, un score tiré au hasard dans son historique par pick (0 quand
+# il n'a pas joué : l'absence est simulée aussi). Tenseur simulations x joueurs
+# x picks restants, traité par blocs ; le total de chaque partie de
+# SEASONS_CONFIG est lu sur les mêmes tirages. Gros calculs : blocs répartis
+# sur un pool de processus. Résultats mis en cache par version des données.
+# Coût ~ simulations x joueurs x picks restants (~10,6 ns par tirage : 100 000
+# simulations x 10 joueurs x 83 picks restants mesurées à 0,88 s) : par défaut le
+# nombre de simulations est réduit pour rester sous la seconde en interactif.
+
+SIMULATIONS = 100_000       # Plafond du nombre de saisons simulées
+MIN_SIMULATIONS = 2_000     # Plancher (erreur type <= 1,1 point de probabilité)
+DRAW_BUDGET = 90_000_000    # Tirages par calcul par défaut : 1 s / 10,6 ns, avec marge
+FORM_PICKS = 15             # Modèle "forme" : tirages dans les 15 derniers picks
+ODDS_MODELS = ('season', 'form')
+BLOCK_DRAWS = 1 << 22       # Tirages par bloc (borne mémoire)
+POOL_MIN_DRAWS = 1 << 28    # Au-delà (et si plusieurs CPU) : pool de processus
+
+
+def simulation_count(n_players, n_picks):
+    """Saisons simulées par défaut : SIMULATIONS, réduit pour tenir dans DRAW_BUDGET tirages."""
+    draws = max(1, n_players * n_picks)
+    return int(min(SIMULATIONS, max(MIN_SIMULATIONS, DRAW_BUDGET // draws)))
+
+
+def simulate_wins(history, base, cuts, n_sims, seed=None):
+    """
+    Victoires par partie et par joueur sur n_sims saisons simulées (égalité en
+    tête : victoire partagée).
+    history : joueurs x K scores par pick (int16) ; base : parties x joueurs,
+    points déjà acquis ; cuts : bornes [a, b) de chaque partie dans les picks restants.
+    """
+    rng = np.random.default_rng(seed)
+    n_players, k = history.shape
+    n_picks = int(max((b for _, b in cuts), default=0))
+    wins = np.zeros(base.shape)
+    if n_players == 0:
+        return wins
+
+    # Découpage des picks restants en segments communs à toutes les parties :
+    # une seule somme par segment, chaque partie additionne ses segments
+    bounds = np.unique([0, n_picks] + [c for cut in cuts for c in cut])
+    spans = [tuple(np.searchsorted(bounds, cut)) for cut in cuts]
+    offsets = (np.arange(n_players, dtype=np.uint32) * k)[None, :, None]
+    block = max(1, BLOCK_DRAWS // max(1, n_players * n_picks))
+    for lo in range(0, n_sims, block):
+        n = min(block, n_sims - lo)
+        size = n * n_players * n_picks
+        # Index uniforme dans [0, K) : 16 bits aléatoires bruts (multiply-shift)
+        bits = rng.bit_generator.random_raw(-(-size // 4)).view(np.uint16)[:size]
+        index = np.multiply(bits, np.uint32(k), dtype=np.uint32)
+        index >>= 16
+        index = index.reshape(n, n_players, n_picks)
+        index += offsets
+        draws = np.take(history, index)
+        segments = np.add.reduceat(draws, bounds[:-1], axis=2, dtype=np.int32) if n_picks else np.zeros((n, n_players, 0), dtype=np.int32)
+        for part, (a, b) in enumerate(spans):
+            totals = base[part] + segments[:, :, a:b].sum(axis=2, dtype=np.int32)
+            leaders = totals == totals.max(axis=1, keepdims=True)
+            wins[part] += (leaders / leaders.sum(axis=1, keepdims=True)).sum(axis=0)
+    return wins
+
+
+def _run(history, base, cuts, n_sims, seed):
+    """simulate_wins, réparti sur le pool de processus pour les très gros calculs."""
+    workers = os.cpu_count() or 1
+    n_picks = max((b for _, b in cuts), default=0)
+    if workers < 2 or n_sims * history.shape[0] * n_picks < POOL_MIN_DRAWS:
+        return simulate_wins(history, base, cuts, n_sims, np.random.SeedSequence(seed))
+    shares = [len(s) for s in np.array_split(np.arange(n_sims), workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    futures = [process_pool().submit(simulate_wins, history, base, cuts, n, child) for n, child in zip(shares, seeds)]
+    return sum(f.result() for f in futures)
+
+
+@cache_by_version(max_entries=8)
+def title_odds(df_full, n_sims=None, model='season', seed=0):
+    """
+    {partie de SEASONS_CONFIG: DataFrame Player, Total (points acquis), Prob}
+    trié par probabilité de titre. Partie terminée : le leader à 100 %.
+    model : 'season' (tous les picks joués) ou 'form' (FORM_PICKS derniers).
+    n_sims : None = simulation_count ; nombre utilisé dans attrs['simulations'].
+    """
+    if df_full.empty:
+        return {}
+    form = rolling_form(df_full)
+    first, latest = form.first_pick, form.first_pick + form.by_pick.shape[1] - 1
+    points, _ = form.cumulative()
+    history = form.by_pick[:, -FORM_PICKS:] if model == 'form' else form.by_pick
+
+    def acquired(start, end):
+        """Points de chaque joueur sur les picks déjà joués de [start, end]."""
+        start, end = max(start, first), min(end, latest)
+        if start > end:
+            return np.zeros(len(form.players), dtype=np.int64)
+        before = points[:, start - first - 1] if start > first else 0
+        return points[:, end - first] - before
+
+    names, base, cuts = [], [], []
+    for name, (start, end) in SEASONS_CONFIG.items():
+        names.append(name)
+        base.append(acquired(start, end))
+        # Picks restants de la partie, en positions dans [latest + 1, ...]
+        cuts.append((max(start - latest - 1, 0), max(end - latest, 0)))
+    base = np.array(base, dtype=np.int32)
+    if n_sims is None:
+        n_sims = simulation_count(len(form.players), max(b for _, b in cuts))
+    wins = _run(history.astype(np.int16), base, cuts, n_sims, seed)
+
+    odds = {}
+    for part, name in enumerate(names):
+        table = pd.DataFrame({'Player': form.players, 'Total': base[part], 'Prob': wins[part] / n_sims})
+        odds[name] = table.sort_values(['Prob', 'Total'], ascending=False, kind='stable').reset_index(drop=True)
+        odds[name].attrs['simulations'] = n_sims
+    return odds
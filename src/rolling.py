@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from src.cache import cache_by_version
+
+# --- MOTEUR DE FORME GLISSANTE (FENÊTRES MULTIPLES) ---
+# Deux matrices denses joueurs x temps construites une fois par version :
+#   - par pick  : colonne = pick (0 si pas joué), pour les formes "N derniers jours"
+#   - par match : scores du joueur alignés à gauche, pour "N derniers matchs"
+# Une somme cumulée par axe suffit ensuite pour toutes les fenêtres : somme et
+# nombre de matchs d'une fenêtre = différence de deux colonnes du cumul.
+# Lignes dans l'ordre d'apparition des joueurs (= ordre de compute_stats).
+
+BY_PICK, BY_GAMES = 'pick', 'games'
+
+
+class RollingForm:
+
+    def __init__(self, df):
+        codes, players = pd.factorize(df['Player'])
+        picks = df['Pick'].to_numpy().astype(np.int64)
+        scores = df['Score'].to_numpy().astype(np.int64)
+        self.players = np.asarray(players, dtype=object)
+        n_players = len(self.players)
+        self.first_pick = int(picks.min()) if len(picks) else 0
+        n_picks = int(picks.max()) - self.first_pick + 1 if len(picks) else 0
+
+        by_pick = np.zeros((n_players, n_picks), dtype=np.int64)
+        played = np.zeros((n_players, n_picks), dtype=np.int64)
+        by_pick[codes, picks - self.first_pick] = scores
+        played[codes, picks - self.first_pick] = 1
+        self.by_pick = by_pick
+
+        # Position de chaque ligne dans l'historique du joueur (ordre des picks)
+        order = np.lexsort((picks, codes))
+        self.games = np.bincount(codes, minlength=n_players)
+        first_row = np.r_[0, np.cumsum(self.games)[:-1]]
+        position = np.arange(len(order)) - first_row[codes[order]]
+        self.by_game = np.zeros((n_players, int(self.games.max()) if n_players else 0), dtype=np.int64)
+        self.by_game[codes[order], position] = scores[order]
+
+        # Cumuls avec une colonne 0 vide : fenêtre ]a, b] = cum[:, b] - cum[:, a]
+        def cumulate(values):
+            return np.concatenate([np.zeros((n_players, 1), dtype=np.int64), np.cumsum(values, axis=1)], axis=1)
+
+        self._cum = {
+            BY_PICK: (cumulate(by_pick), cumulate(played)),
+            BY_GAMES: (cumulate(self.by_game), cumulate(np.arange(self.by_game.shape[1]) < self.games[:, None])),
+        }
+
+    def cumulative(self, by=BY_PICK):
+        """(points, matchs) cumulés : matrices joueurs x positions (après chaque pick / match)."""
+        cum, count = self._cum[by]
+        return cum[:, 1:], count[:, 1:]
+
+    def rolling(self, windows, by=BY_PICK):
+        """
+        {fenêtre: (sommes, matchs)} : matrices joueurs x positions, la colonne t
+        couvrant les `fenêtre` dernières positions jusqu'à t incluse.
+        """
+        cum, count = self._cum[by]
+        length = cum.shape[1] - 1
+        out = {}
+        for window in windows:
+            lo = np.maximum(np.arange(1, length + 1) - window, 0)
+            out[window] = (cum[:, 1:] - cum[:, lo], count[:, 1:] - count[:, lo])
+        return out
+
+    def rolling_means(self, windows, by=BY_PICK):
+        """{fenêtre: moyennes glissantes} (NaN sans match dans la fenêtre)."""
+        means = {}
+        for window, (sums, games) in self.rolling(windows, by).items():
+            means[window] = sums / np.where(games > 0, games, np.nan)
+        return means
+
+    def last(self, window, by=BY_PICK):
+        """(sommes, matchs) de la fenêtre finale : `window` derniers picks de la frame ou derniers matchs du joueur."""
+        cum, count = self._cum[by]
+        if by == BY_PICK:
+            end = np.full(len(self.players), cum.shape[1] - 1)
+        else:
+            end = self.games
+        rows = np.arange(len(self.players))
+        start = np.maximum(end - window, 0)
+        return cum[rows, end] - cum[rows, start], count[rows, end] - count[rows, start]
+
+    def last_mean(self, window, by=BY_PICK):
+        """Moyenne de la fenêtre finale par joueur (NaN sans match)."""
+        sums, games = self.last(window, by)
+        return sums / np.where(games > 0, games, np.nan)
+
+    def form(self, window=None, by=BY_PICK, min_games=1):
+        """
+        Total, Games, Moyenne de la fenêtre finale (toute la frame si window=None),
+        index = Player trié, joueurs avec moins de min_games exclus.
+        """
+        if window is None:
+            window = self._cum[by][0].shape[1]
+        sums, games = self.last(window, by)
+        out = pd.DataFrame({'Total': sums, 'Games': games}, index=pd.Index(self.players, name='Player')).sort_index()
+        out = out[out['Games'] >= min_games]
+        out['Moyenne'] = out['Total'] / out['Games'].where(out['Games'] > 0)
+        return out
+
+    def best(self, window, by=BY_GAMES):
+        """Meilleure somme sur une fenêtre complète (`window` matchs) ; 0 si aucune."""
+        sums, games = self.rolling([window], by)[window]
+        complete = games == window
+        floor = np.iinfo(np.int64).min
+        return np.where(complete.any(axis=1), np.where(complete, sums, floor).max(axis=1, initial=floor), 0)
+
+    def recent(self, n):
+        """n derniers scores de chaque joueur (du plus ancien au plus récent)."""
+        return [row[max(0, g - n):g].tolist() for row, g in zip(self.by_game, self.games)]
+
+
+@cache_by_version(max_entries=8)
+def rolling_form(df):
+    """Moteur de forme de df (mis en cache par version des données)."""
+    return RollingForm(df)
@@ -0,0 +1,61 @@
+import os
+import json
+import time
+import pandas as pd
+
+# --- CONFIGURATION ---
+# Dossier local des snapshots (surchargeable via DINO_SNAPSHOT_DIR)
+SNAPSHOT_DIR = os.environ.get(
+    "DINO_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".snapshot")
+)
+SNAPSHOT_NAME = "valeurs"
+
+
+def _paths(name):
+    base = os.path.join(SNAPSHOT_DIR, name)
+    return base + ".parquet", base + ".json"
+
+
+def _int_keys(d):
+    """JSON ne garde que des clés string : on restaure les clés entières (picks, decks)."""
+    return {int(k): v for k, v in d.items()}
+
+
+def save_snapshot(df, meta, name=SNAPSHOT_NAME):
+    """
+    Écrit le DataFrame long en Parquet + les objets annexes en JSON.
+    Écriture atomique (fichier temporaire puis os.replace) : un lecteur ne voit
+    jamais un snapshot à moitié écrit. Le JSON, écrit en dernier, fait foi.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    parquet_path, json_path = _paths(name)
+
+    frame = df.copy(deep=False)
+    frame.attrs = {}
+    frame.to_parquet(parquet_path + ".tmp", index=False)
+    os.replace(parquet_path + ".tmp", parquet_path)
+
+    meta = dict(meta, saved_at=time.time(), rows=len(df))
+    with open(json_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, default=int)
+    os.replace(json_path + ".tmp", json_path)
+
+
+def load_snapshot(name=SNAPSHOT_NAME):
+    """Retourne (df, meta) ou (None, None) si absent / incohérent."""
+    parquet_path, json_path = _paths(name)
+    if not (os.path.exists(parquet_path) and os.path.exists(json_path)):
+        return None, None
+    try:
+        with open(json_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        df = pd.read_parquet(parquet_path)
+    except Exception:
+        return None, None
+    if len(df) != meta.get('rows'):
+        return None, None
+
+    for key in ('deck_tracks', 'bp_true', 'daily_max_map'):
+        meta[key] = _int_keys(meta.get(key) or {})
+    return df, meta
@@ -0,0 +1,174 @@
+import os
+from abc import ABC, abstractmethod
+import gspread
+import pandas as pd
+import streamlit as st
+from streamlit_gsheets import GSheetsConnection
+from gspread.utils import rowcol_to_a1
+from src.config import DATA_SOURCE
+
+# --- SOURCES DE DONNÉES ---
+# Toutes les sources renvoient la même matrice brute "Valeurs" (header=None,
+# cellules en string, colonne A = libellés) : le parser ne sait pas d'où elle vient.
+
+WORKSHEET = "Valeurs"
+
+
+def _renumber(window, n_rows):
+    """Complète à n_rows lignes et renumérote les colonnes à partir de 1."""
+    window = window.reset_index(drop=True).reindex(range(n_rows)).astype(str)
+    window.columns = range(1, window.shape[1] + 1)
+    return window
+
+
+def _labels(full, n_rows):
+    """Colonne A sur n_rows lignes (complétée par des cases vides), en texte."""
+    if full.shape[1] == 0:
+        return pd.Series([''] * n_rows)
+    return full.iloc[:n_rows, 0].reset_index(drop=True).reindex(range(n_rows)).astype(str)
+
+
+def slice_window(full, first_col, n_rows):
+    """Découpe [first_col..fin] x [0..n_rows[ d'une matrice complète."""
+    return _renumber(full.iloc[:n_rows, first_col:], n_rows)
+
+
+class DataSource(ABC):
+    """
+    Interface d'une source de données.
+    read() : onglet complet. read(first_col, n_rows) : seulement la plage
+    bornée à partir de la colonne first_col (index 0 = colonne A), sur les
+    n_rows premières lignes, colonnes renumérotées à partir de 1.
+    read_labels(n_rows) : colonne A (libellés) sur les n_rows premières lignes.
+    """
+    name = "source"
+
+    @property
+    def snapshot_name(self):
+        """Nom du snapshot disque associé (un par source, pour ne pas les mélanger)."""
+        return self.name
+
+    @abstractmethod
+    def read(self, first_col=None, n_rows=None):
+        """Matrice brute (cellules en string), complète ou bornée."""
+
+    def read_labels(self, n_rows):
+        return _labels(self.read(), n_rows)
+
+    def uncached(self):
+        """Même source sans cache de lecture (actualisation forcée par l'utilisateur)."""
+        return self
+
+
+def _gsheets_secrets():
+    return st.secrets.get("connections", {}).get("gsheets", {})
+
+
+@st.cache_resource(show_spinner=False)
+def _gspread_client():
+    """
+    Client gspread du compte de service de la connexion "gsheets" (mêmes
+    secrets), pour les lectures de plages bornées via l'API publique de gspread.
+    """
+    creds = {k: v for k, v in _gsheets_secrets().items() if k not in ("spreadsheet", "worksheet")}
+    return gspread.service_account_from_dict(creds)
+
+
+class GSheetsSource(DataSource):
+    """Google Sheets via st.connection("gsheets") et st.secrets["SPREADSHEET_URL"]."""
+    name = "valeurs"
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+
+    def uncached(self):
+        # conn.read est lui-même mis en cache (st.cache_data, ttl) : ttl=0 relit l'onglet
+        return GSheetsSource(ttl=0)
+
+    @property
+    def conn(self):
+        return st.connection("gsheets", type=GSheetsConnection)
+
+    @property
+    def url(self):
+        return st.secrets["SPREADSHEET_URL"]
+
+    @property
+    def service_account(self):
+        """Plages A1 bornées lisibles (compte de service) ; sinon CSV complet seulement."""
+        return _gsheets_secrets().get("type") == "service_account"
+
+    def worksheet(self):
+        return _gspread_client().open_by_url(self.url).worksheet(WORKSHEET)
+
+    def read(self, first_col=None, n_rows=None):
+        # On lit tout en string pour éviter les erreurs de conversion
+        if first_col is None:
+            return self.conn.read(spreadsheet=self.url, worksheet=WORKSHEET, header=None, ttl=self.ttl).astype(str)
+
+        # Plage A1 bornée : uniquement possible avec un compte de service (gspread).
+        # Le client "public" ne sait lire que le CSV complet : on le découpe localement.
+        if self.service_account:
+            ws = self.worksheet()
+            a1 = f"{rowcol_to_a1(1, first_col + 1)}:{rowcol_to_a1(n_rows, ws.col_count)}"
+            return _renumber(pd.DataFrame(ws.get_values(a1)), n_rows)
+
+        full = self.conn.read(spreadsheet=self.url, worksheet=WORKSHEET, header=None, ttl=self.ttl)
+        return slice_window(full, first_col, n_rows)
+
+    def read_labels(self, n_rows):
+        if self.service_account:
+            ws = self.worksheet()
+            return _labels(pd.DataFrame(ws.get_values(f"A1:A{n_rows}")), n_rows)
+        return super().read_labels(n_rows)
+
+
+class LocalFileSource(DataSource):
+    """
+    Export local de l'onglet "Valeurs" (CSV ou XLSX, même mise en page).
+    Le fichier n'est relu que si sa date de modification change.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._cache_key = None
+        self._cache_df = None
+
+    @property
+    def name(self):
+        return "local-" + os.path.splitext(os.path.basename(self.path))[0]
+
+    def _read_file(self):
+        stat = os.stat(self.path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key != self._cache_key:
+            if self.path.lower().endswith((".xlsx", ".xlsm", ".xls")):
+                # Dépendance optionnelle (openpyxl) : uniquement pour les exports Excel
+                df = pd.read_excel(self.path, sheet_name=WORKSHEET, header=None, dtype=str)
+            else:
+                df = pd.read_csv(self.path, header=None, dtype=str)
+            self._cache_df = df.astype(str)
+            self._cache_key = key
+        return self._cache_df
+
+    def read(self, first_col=None, n_rows=None):
+        full = self._read_file()
+        if first_col is None:
+            return full.copy()
+        return slice_window(full, first_col, n_rows)
+
+
+def get_data_source(ttl=300):
+    """
+    Source choisie par la variable d'environnement DINO_DATA_SOURCE, sinon par
+    config.DATA_SOURCE : "gsheets" ou le chemin d'un fichier CSV/XLSX.
+    """
+    choice = os.environ.get("DINO_DATA_SOURCE", DATA_SOURCE).strip()
+    if choice.lower() in ("", "gsheets"):
+        return GSheetsSource(ttl=ttl)
+    return _local_source(os.path.abspath(choice))
+
+
+@st.cache_resource(show_spinner=False)
+def _local_source(path):
+    return LocalFileSource(path)
@@ -1,255 +1,447 @@
 import pandas as pd
 import numpy as np
 import streamlit as st
+import threading
+from src.config import SEASONS_CONFIG, SEASON_ID
+from src.aggregates import pick_slice
+from src.rolling import rolling_form, BY_PICK
+from src.metrics import metric_context, MetricContext
+from src.cache import cache_by_version
 
-# OPTIMISATION : CACHING STATS CALCULATION
-@st.cache_data(ttl=300, show_spinner=False) 
-def compute_stats(df, bp_map, daily_max_map):
-    stats = []
-    if df.empty: return pd.DataFrame()
-    
-    # --- PRÉ-CALCULS GLOBAUX (CONTEXTE) ---
-    
-    # 1. Moyennes et Rangs par jour pour Dominator, Medalist, Shield
-    daily_groups = df.groupby('Pick')['Score']
-    daily_means = daily_groups.mean()
-    
-    # Rang Descendant (1er = Meilleur score) pour Medalist
-    df['RankDesc'] = daily_groups.rank(ascending=False, method='min')
-    
-    # Rang Ascendant (1er = Pire score) pour Shield
-    df['RankAsc'] = daily_groups.rank(ascending=True, method='min')
-    
-    # 2. Identification du "Pire soir" pour The Savior
-    daily_sums = daily_groups.sum()
-    worst_night_pick = daily_sums.idxmin() if not daily_sums.empty else -1
-    
-    # 3. Soloist : Soirs où un SEUL joueur a dépassé 40
-    over_40 = df[df['Score'] > 40].groupby('Pick')['Player'].count()
-    soloist_picks = over_40[over_40 == 1].index.tolist()
-
-    # --- CALCULS PAR JOUEUR ---
-    
-    # Prép. Trend Data
-    trend_data = {}
-    for p, d in df.sort_values('Pick').groupby('Player'): 
-        trend_data[p] = d['Score'].tail(20).tolist()
-    
-    season_avgs = df.groupby('Player')['Score'].mean()
-    season_avgs_raw = df.groupby('Player')['ScoreVal'].mean()
-    latest_pick = df['Pick'].max()
-    
-    # Moyennes glissantes globales
-    df_15 = df[df['Pick'] > (latest_pick - 15)]
-    avg_15 = df_15.groupby('Player')['Score'].mean()
-    df_10 = df[df['Pick'] > (latest_pick - 10)]
-    avg_10 = df_10.groupby('Player')['Score'].mean()
-
-    for p in df['Player'].unique():
-        d = df[df['Player'] == p].sort_values('Pick')
-        
-        # Vecteurs de données
-        scores = d['Score'].values
-        scores_raw = d['ScoreVal'].values
-        picks = d['Pick'].values
-        bonuses = d['IsBonus'].values
-        z_scores = d['ZScore'].values
-        is_bp_list = d['IsBP'].values
-        ranks_desc = d['RankDesc'].values
-        ranks_asc = d['RankAsc'].values
-        
-        # --- 1. METRIQUES CLASSIQUES ---
-        bonus_data = d[d['IsBonus'] == True]
-        scores_with_bonus = bonus_data['Score'].values
-        scores_without_bonus = d[d['IsBonus'] == False]['Score'].values
-        
-        avg_with_bonus = scores_with_bonus.mean() if len(scores_with_bonus) > 0 else 0
-        avg_without_bonus = scores_without_bonus.mean() if len(scores_without_bonus) > 0 else 0
-        best_with_bonus = scores_with_bonus.max() if len(scores_with_bonus) > 0 else 0
-        best_without_bonus = scores_without_bonus.max() if len(scores_without_bonus) > 0 else 0 
-        
-        # --- 2. SÉRIES HISTORIQUES (Fonction Helper) ---
-        def get_max_streak(val_list, threshold):
-            max_s = 0
-            curr_s = 0
-            for v in val_list:
-                if v >= threshold:
-                    curr_s += 1
-                    max_s = max(max_s, curr_s)
-                else:
-                    curr_s = 0
-            return max_s
-
-        # Séries en cours (Trends)
-        current_no_carrot_streak = 0
-        for s in reversed(scores):
-            if s >= 20: current_no_carrot_streak += 1
-            else: break
-            
-        streak_30_curr = 0
-        for s in reversed(scores):
-            if s >= 30: streak_30_curr += 1
-            else: break
-
-        # Séries HoF
-        max_no_carrot = get_max_streak(scores, 20)
-        max_unstoppable = get_max_streak(scores, 40)
-        max_alien_streak = get_max_streak(scores, 60)
-        
-        # --- 3. LOGIQUES SPÉCIFIQUES HOF ---
-        try: prime_time = d.groupby('Month')['Score'].mean().max()
-        except: prime_time = 0
-        
-        iron_lungs = scores_raw.sum()
-        sixth_man_count = len(scores[(scores >= 30) & (scores < 40)])
-        medalist_count = np.sum(ranks_desc <= 3)
-        last_place_count = np.sum(ranks_asc == 1)
-        
-        dominator_count = 0
-        for pick_idx, sc in zip(picks, scores):
-            if pick_idx in daily_means and sc > daily_means[pick_idx]:
-                dominator_count += 1
-                
-        savior_val = 0
-        savior_match = d[d['Pick'] == worst_night_pick]
-        if not savior_match.empty:
-            savior_val = savior_match['Score'].iloc[0]
-            
-        soloist_count = len(d[d['Pick'].isin(soloist_picks) & (d['Score'] > 40)])
-        
-        ghost_count = 0
-        for sc, rk in zip(scores, ranks_desc):
-            if sc > 35 and rk > 1:
-                ghost_count += 1
-                
-        # CORRECTION BAD LUCK : Score BRUT max sans BP
-        non_bp_raw_scores = scores_raw[~is_bp_list]
-        bad_luck_score = non_bp_raw_scores.max() if len(non_bp_raw_scores) > 0 else 0
-        
-        bp_scores_only = scores[is_bp_list]
-        braqueur_score = bp_scores_only.min() if len(bp_scores_only) > 0 else 999 
-        
-        deck_score = 0
-        if len(scores) >= 7:
-            deck_score = pd.Series(scores).rolling(window=7).sum().max()
-            
-        phoenix_score = 0
-        for i in range(1, len(scores)):
-            if scores[i-1] < 20 and scores[i] > phoenix_score: 
-                phoenix_score = scores[i]
-
-        try:
-            vals, counts = np.unique(scores, return_counts=True)
-            max_count_idx = np.argmax(counts)
-            mode_score = vals[max_count_idx]
-            mode_count = counts[max_count_idx]
-        except: mode_score = 0; mode_count = 0
-
-        spread = scores.max() - scores.min()
-
-        # --- 4. EXPORT ---
-        scores_last_7 = d['Score'].tail(7)
-        avg_last_7 = scores_last_7.mean() if len(scores_last_7) > 0 else 0
-        diff_7 = avg_last_7 - scores.mean() 
-        trend_icon = "↗️" if diff_7 >= 1 else ("↘️" if diff_7 <= -1 else "➡️")
-        
-        last_5 = scores[-5:]
-        last5_avg = last_5.mean() if len(scores) >= 5 else scores.mean()
-        momentum = last5_avg - scores.mean()
-        
-        bp_count = d['IsBP'].sum()
-        
-        alpha_count = 0; bonus_points_gained = 0; bonus_scores_list = []
-        for i, (pick_num, score) in enumerate(zip(picks, scores)):
-            if pick_num in daily_max_map and score >= daily_max_map[pick_num] and score > 0: alpha_count += 1
-            if bonuses[i]: 
-                gain = score - scores_raw[i]
-                bonus_points_gained += gain
-                bonus_scores_list.append(score)
-        
-        best_bonus = max(bonus_scores_list) if bonus_scores_list else 0
-        worst_bonus = min(bonus_scores_list) if bonus_scores_list else 0
-        avg_bonus_score = np.mean(bonus_scores_list) if bonus_scores_list else 0
-        
-        s_avg = season_avgs.get(p, 0)
-        s_avg_raw = season_avgs_raw.get(p, 0)
-        l15_avg = avg_15.get(p, s_avg)
-        l10_avg = avg_10.get(p, s_avg)
-        progression_pct = ((l15_avg - s_avg) / s_avg) * 100 if s_avg > 0 else 0
-        reliability_pct = ((len(scores) - len(scores[scores < 20])) / len(scores)) * 100
-        avg_z = np.mean(z_scores) if len(z_scores) > 0 else 0
-        
-        count_20_30 = len(scores[(scores >= 20) & (scores <= 30)])
-
-        stats.append({
-            'Player': p, 'Games': len(scores),
-            'Total': scores.sum(), 'Moyenne': scores.mean(), 'Moyenne_Raw': s_avg_raw,
-            'StdDev': scores.std(), 'Best': scores.max(), 'Best_Raw': scores_raw.max(),
-            'Worst': scores.min(), 'Worst_Raw': scores_raw.min(), 
-            'Last': scores[-1], 'LastIsBonus': bonuses[-1] if len(bonuses) > 0 else False, 
-            'Last5': last5_avg, 'Last10': l10_avg, 'Last15': l15_avg,
-            
-            # Counts
-            'Count30': len(scores[scores >= 30]), 'Count40': len(scores[scores >= 40]),
-            'Count35': len(scores[scores > 35]), 'Count2030': count_20_30,
-            'Carottes': len(scores[scores < 20]), 'Nukes': len(scores[scores >= 50]),
-            'BP_Count': bp_count, 'Alpha_Count': alpha_count,
-            
-            # HOF New Metrics
-            'MaxUnstoppable': max_unstoppable,
-            'PrimeTime': prime_time,
-            'IronLungs': iron_lungs,
-            'SixthMan': sixth_man_count,
-            'Medalist': medalist_count,
-            'ShieldCount': last_place_count,
-            'Dominator': dominator_count,
-            'SaviorScore': savior_val,
-            'Soloist': soloist_count,
-            'Ghost': ghost_count,
-            'Braqueur': braqueur_score,
-            'BadLuck': bad_luck_score,
-            'MaxDeck': deck_score,
-            'MaxPhoenix': phoenix_score,
-            'CurrentNoCarrot': current_no_carrot_streak, 
-            'MaxNoCarrot': max_no_carrot, 
-            'MaxAlien': max_alien_streak,
-            
-            # Context
-            'Bonus_Gained': bonus_points_gained, 'Best_Bonus': best_bonus, 'Worst_Bonus': worst_bonus,
-            'Avg_Bonus': avg_bonus_score, 'Momentum': momentum, 'ProgressionPct': progression_pct, 
-            'ReliabilityPct': reliability_pct, 'AvgZ': avg_z, 'Trend': trend_data.get(p, []), 
-            'AvgWithBonus': avg_with_bonus, 'AvgWithoutBonus': avg_without_bonus, 'BonusPlayed': len(scores_with_bonus),
-            'ModeScore': mode_score, 'ModeCount': mode_count, 'Spread': spread, 'Trend7Icon': trend_icon
+# Colonnes calculées à la demande par le registre de métriques (src/metrics.py).
+# Contexte mis en cache par version des données : les intermédiaires (table
+# triée, segments, groupby...) et métriques déjà demandées ne sont pas recalculés.
+def compute_stats(df, bp_map, daily_max_map, metrics=None):
+    """
+    Stats par joueur (une ligne par joueur, ordre d'apparition dans df).
+    metrics : noms des colonnes voulues (toutes par défaut) ; seules celles-ci
+    et leurs dépendances sont calculées.
+    """
+    return metric_context(df, bp_map, daily_max_map).frame(metrics)
+
+# --- ACCUMULATEUR INCRÉMENTAL (SAISON COMPLÈTE) ---
+# Même tableau que compute_stats(df, bp_map, daily_max_map) pour la saison
+# complète, mais mis à jour pick par pick : absorber une nouvelle colonne coûte
+# O(joueurs) au lieu de tout recalculer. Une correction d'un pick déjà absorbé
+# impose une reconstruction (from_frame).
+
+STREAK_THRESHOLDS = (20, 40, 60)
+HISTORY_LEN = 20  # Trend (20 derniers) ; couvre aussi Last5/7/10/15
+NO_SCORE = np.iinfo(np.int64).min   # BadLuck / MaxDeck : aucun score encore vu (scores négatifs possibles)
+
+
+class StatsAccumulator:
+
+    def __init__(self):
+        self.players = []            # Ordre d'apparition (= ordre de compute_stats)
+        self.index = {}
+        self.last_pick = 0
+        self.worst_night_sum = None
+        self.months = {}
+        n = 0
+        self.games = np.zeros(n, dtype=np.int64)
+        self.sums = {k: np.zeros(n, dtype=np.int64) for k in ('score', 'raw', 'bonus_gain', 'bonus_score', 'plain_score')}
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)        # Variance en ligne (Welford)
+        self.sum_z = np.zeros(n)
+        self.counts = {k: np.zeros(n, dtype=np.int64) for k in (
+            'c30', 'c40', 'c35', 'c2030', 'carrots', 'nukes', 'sixth', 'bp', 'alpha', 'medalist',
+            'shield', 'dominator', 'ghost', 'soloist', 'bonus')}
+        self.best = np.zeros(n, dtype=np.int64); self.worst = np.zeros(n, dtype=np.int64)
+        self.best_raw = np.zeros(n, dtype=np.int64); self.worst_raw = np.zeros(n, dtype=np.int64)
+        self.best_bonus = np.zeros(n, dtype=np.int64); self.worst_bonus = np.zeros(n, dtype=np.int64)
+        self.bad_luck = np.full(n, NO_SCORE, dtype=np.int64); self.braqueur = np.zeros(n, dtype=np.int64)
+        self.last = np.zeros(n, dtype=np.int64); self.last_bonus = np.zeros(n, dtype=bool)
+        self.phoenix = np.zeros(n, dtype=np.int64); self.max_deck = np.full(n, NO_SCORE, dtype=np.int64)
+        self.savior = np.zeros(n, dtype=np.int64)
+        self.current = {t: np.zeros(n, dtype=np.int64) for t in STREAK_THRESHOLDS}
+        self.best_streak = {t: np.zeros(n, dtype=np.int64) for t in STREAK_THRESHOLDS}
+        self.score_counts = np.zeros((n, 256), dtype=np.int64)     # Mode : colonne j = score score_min + j
+        self.score_min = 0           # Abaissé au premier score négatif (scores TTFL < 0 possibles)
+        self.month_sum = np.zeros((n, 0)); self.month_n = np.zeros((n, 0))   # PrimeTime
+        self.history = []            # Par joueur : [(pick, score), ...] des HISTORY_LEN derniers
+
+    @classmethod
+    def from_frame(cls, df):
+        """Reconstruction complète : absorbe les picks de df dans l'ordre."""
+        acc = cls()
+        cols = cls._columns(df.sort_values('Pick', kind='stable'))
+        bounds = np.flatnonzero(np.r_[True, cols['Pick'][1:] != cols['Pick'][:-1], True])
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            acc._absorb({k: v[lo:hi] for k, v in cols.items()})
+        return acc
+
+    @staticmethod
+    def _columns(df):
+        cols = {k: df[k].to_numpy() for k in ('Pick', 'IsBonus', 'IsBP', 'RankDesc', 'RankAsc', 'ZScore', 'IsDailyMax', 'GapToMean')}
+        cols['Player'] = df['Player'].astype(object).to_numpy()
+        cols['Month'] = df['Month'].astype(str).to_numpy()
+        cols['Score'] = df['Score'].to_numpy().astype(np.int64)
+        cols['ScoreVal'] = df['ScoreVal'].to_numpy().astype(np.int64)
+        return cols
+
+    def copy(self):
+        """Copie indépendante (l'état servi reste immuable pendant la mise à jour)."""
+        new = StatsAccumulator.__new__(StatsAccumulator)
+        for k, v in self.__dict__.items():
+            if isinstance(v, np.ndarray):
+                v = v.copy()
+            elif isinstance(v, dict):
+                v = {kk: (vv.copy() if isinstance(vv, np.ndarray) else vv) for kk, vv in v.items()}
+            elif k == 'history':
+                v = [list(h) for h in v]
+            elif isinstance(v, list):
+                v = list(v)
+            setattr(new, k, v)
+        return new
+
+    def _add_players(self, names):
+        new = [p for p in names if p not in self.index]
+        if not new:
+            return
+        for p in new:
+            self.index[p] = len(self.players)
+            self.players.append(p)
+            self.history.append([])
+        k = len(new)
+
+        def grow(a, fill=0):
+            pad = np.full((k,) + a.shape[1:], fill, dtype=a.dtype)
+            return np.concatenate([a, pad])
+
+        self.games = grow(self.games); self.mean = grow(self.mean); self.m2 = grow(self.m2); self.sum_z = grow(self.sum_z)
+        self.sums = {key: grow(v) for key, v in self.sums.items()}
+        self.counts = {key: grow(v) for key, v in self.counts.items()}
+        self.current = {t: grow(v) for t, v in self.current.items()}
+        self.best_streak = {t: grow(v) for t, v in self.best_streak.items()}
+        for name in ('best', 'worst', 'best_raw', 'worst_raw', 'best_bonus', 'worst_bonus', 'last',
+                     'last_bonus', 'phoenix', 'savior'):
+            setattr(self, name, grow(getattr(self, name)))
+        self.bad_luck = grow(self.bad_luck, NO_SCORE); self.max_deck = grow(self.max_deck, NO_SCORE)
+        self.braqueur = grow(self.braqueur, 999)
+        self.score_counts = grow(self.score_counts)
+        self.month_sum = grow(self.month_sum); self.month_n = grow(self.month_n)
+
+    def absorb(self, pick_rows):
+        """Ajoute un pick (toutes les lignes d'un même pick, features par pick incluses)."""
+        self._absorb(self._columns(pick_rows))
+
+    def _absorb(self, pick_rows):
+        pick = int(pick_rows['Pick'][0])
+        self._add_players(pick_rows['Player'].tolist())
+        ids = np.array([self.index[p] for p in pick_rows['Player']], dtype=np.int64)
+        score = pick_rows['Score']
+        raw = pick_rows['ScoreVal']
+        bonus = pick_rows['IsBonus']
+        bp = pick_rows['IsBP']
+        rank_desc = pick_rows['RankDesc']
+        first_game = self.games[ids] == 0
+
+        # Moyenne / variance en ligne (Welford) et sommes
+        self.games[ids] += 1
+        delta = score - self.mean[ids]
+        self.mean[ids] += delta / self.games[ids]
+        self.m2[ids] += delta * (score - self.mean[ids])
+        self.sum_z[ids] += pick_rows['ZScore']
+        self.sums['score'][ids] += score
+        self.sums['raw'][ids] += raw
+        self.sums['bonus_gain'][ids] += np.where(bonus, score - raw, 0)
+        self.sums['bonus_score'][ids] += np.where(bonus, score, 0)
+        self.sums['plain_score'][ids] += np.where(bonus, 0, score)
+
+        # Compteurs par seuil et features du soir
+        c = self.counts
+        c['c30'][ids] += score >= 30; c['c40'][ids] += score >= 40; c['c35'][ids] += score > 35
+        c['c2030'][ids] += (score >= 20) & (score <= 30); c['carrots'][ids] += score < 20
+        c['nukes'][ids] += score >= 50; c['sixth'][ids] += (score >= 30) & (score < 40)
+        c['bp'][ids] += bp; c['bonus'][ids] += bonus
+        c['alpha'][ids] += pick_rows['IsDailyMax'] & (score > 0)
+        c['medalist'][ids] += rank_desc <= 3
+        c['shield'][ids] += pick_rows['RankAsc'] == 1
+        c['dominator'][ids] += pick_rows['GapToMean'] > 0
+        c['ghost'][ids] += (score > 35) & (rank_desc > 1)
+        if np.sum(score > 40) == 1:
+            c['soloist'][ids] += score > 40
+
+        # Extrêmes
+        self.best[ids] = np.where(first_game, score, np.maximum(self.best[ids], score))
+        self.worst[ids] = np.where(first_game, score, np.minimum(self.worst[ids], score))
+        self.best_raw[ids] = np.where(first_game, raw, np.maximum(self.best_raw[ids], raw))
+        self.worst_raw[ids] = np.where(first_game, raw, np.minimum(self.worst_raw[ids], raw))
+        first_bonus = bonus & (c['bonus'][ids] == 1)
+        self.best_bonus[ids] = np.where(bonus, np.where(first_bonus, score, np.maximum(self.best_bonus[ids], score)), self.best_bonus[ids])
+        self.worst_bonus[ids] = np.where(bonus, np.where(first_bonus, score, np.minimum(self.worst_bonus[ids], score)), self.worst_bonus[ids])
+        self.bad_luck[ids] = np.where(bp, self.bad_luck[ids], np.maximum(self.bad_luck[ids], raw))
+        self.braqueur[ids] = np.where(bp, np.minimum(self.braqueur[ids], score), self.braqueur[ids])
+
+        # Séries, Phoenix (score juste après une carotte)
+        self.phoenix[ids] = np.where(~first_game & (self.last[ids] < 20), np.maximum(self.phoenix[ids], score), self.phoenix[ids])
+        for t in STREAK_THRESHOLDS:
+            cur = np.where(score >= t, self.current[t][ids] + 1, 0)
+            self.current[t][ids] = cur
+            self.best_streak[t][ids] = np.maximum(self.best_streak[t][ids], cur)
+        self.last[ids] = score
+        self.last_bonus[ids] = bonus
+
+        # Mode (compte par score) et PrimeTime (moyenne par mois)
+        if score.min() < self.score_min:
+            extra = np.zeros((len(self.players), self.score_min - int(score.min())), dtype=np.int64)
+            self.score_counts = np.hstack([extra, self.score_counts])
+            self.score_min = int(score.min())
+        if score.max() - self.score_min >= self.score_counts.shape[1]:
+            extra = np.zeros((len(self.players), int(score.max()) - self.score_min + 1 - self.score_counts.shape[1]), dtype=np.int64)
+            self.score_counts = np.hstack([self.score_counts, extra])
+        self.score_counts[ids, score - self.score_min] += 1
+        months = pick_rows['Month']
+        for m in np.unique(months):
+            if m not in self.months:
+                self.months[m] = len(self.months)
+                self.month_sum = np.hstack([self.month_sum, np.zeros((len(self.players), 1))])
+                self.month_n = np.hstack([self.month_n, np.zeros((len(self.players), 1))])
+        month_idx = np.array([self.months[m] for m in months], dtype=np.int64)
+        self.month_sum[ids, month_idx] += score
+        self.month_n[ids, month_idx] += 1
+
+        # Historique court (Trend, formes récentes, meilleur Deck sur 7 matchs)
+        for i, sc in zip(ids.tolist(), score.tolist()):
+            hist = self.history[i]
+            hist.append((pick, sc))
+            if len(hist) > HISTORY_LEN:
+                del hist[0]
+            if len(hist) >= 7:
+                self.max_deck[i] = max(self.max_deck[i], sum(v for _, v in hist[-7:]))
+
+        # Pire soir de l'équipe (The Savior) : le premier en cas d'égalité
+        night = int(score.sum())
+        if self.worst_night_sum is None or night < self.worst_night_sum:
+            self.worst_night_sum = night
+            self.savior[:] = 0
+            self.savior[ids[::-1]] = score[::-1]
+
+        self.last_pick = max(self.last_pick, pick)
+
+    def to_frame(self):
+        """Matérialise le tableau de compute_stats (mêmes colonnes, même ordre)."""
+        if not self.players:
+            return pd.DataFrame()
+        c = self.counts
+        games = self.games
+        moyenne = self.sums['score'] / games
+
+        def recent_mean(keep, fallback):
+            out = []
+            for i, hist in enumerate(self.history):
+                vals = [v for k, (p, v) in enumerate(hist) if keep(p, len(hist) - 1 - k)]
+                out.append(np.mean(vals) if vals else fallback[i])
+            return np.array(out, dtype=float)
+
+        last5 = recent_mean(lambda p, from_end: from_end < 5, moyenne)
+        last7 = recent_mean(lambda p, from_end: from_end < 7, moyenne)
+        l10 = recent_mean(lambda p, from_end: p > self.last_pick - 10, moyenne)
+        l15 = recent_mean(lambda p, from_end: p > self.last_pick - 15, moyenne)
+
+        bonus_n = c['bonus']
+        plain_n = games - bonus_n
+        avg_bonus = np.divide(self.sums['bonus_score'], bonus_n, out=np.zeros(len(games)), where=bonus_n > 0)
+        avg_plain = np.divide(self.sums['plain_score'], plain_n, out=np.zeros(len(games)), where=plain_n > 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            prime = np.where(self.month_n > 0, self.month_sum / np.where(self.month_n > 0, self.month_n, 1), -np.inf).max(axis=1)
+        has_deck = games >= 7
+        max_deck = np.where(has_deck, self.max_deck, 0)
+        max_deck = max_deck.astype(float) if has_deck.any() else max_deck
+        diff_7 = last7 - moyenne
+
+        return pd.DataFrame({
+            'Player': np.asarray(self.players, dtype=object), 'Games': games.copy(),
+            'Total': self.sums['score'].copy(), 'Moyenne': moyenne, 'Moyenne_Raw': self.sums['raw'] / games,
+            'StdDev': np.sqrt(self.m2 / games), 'Best': self.best.copy(), 'Best_Raw': self.best_raw.copy(),
+            'Worst': self.worst.copy(), 'Worst_Raw': self.worst_raw.copy(),
+            'Last': self.last.copy(), 'LastIsBonus': self.last_bonus.copy(),
+            'Last5': last5, 'Last10': l10, 'Last15': l15,
+            'Count30': c['c30'].copy(), 'Count40': c['c40'].copy(),
+            'Count35': c['c35'].copy(), 'Count2030': c['c2030'].copy(),
+            'Carottes': c['carrots'].copy(), 'Nukes': c['nukes'].copy(),
+            'BP_Count': c['bp'].copy(), 'Alpha_Count': c['alpha'].copy(),
+            'MaxUnstoppable': self.best_streak[40].copy(),
+            'PrimeTime': prime,
+            'IronLungs': self.sums['raw'].copy(),
+            'SixthMan': c['sixth'].copy(),
+            'Medalist': c['medalist'].copy(),
+            'ShieldCount': c['shield'].copy(),
+            'Dominator': c['dominator'].copy(),
+            'SaviorScore': self.savior.copy(),
+            'Soloist': c['soloist'].copy(),
+            'Ghost': c['ghost'].copy(),
+            'Braqueur': self.braqueur.copy(),
+            'BadLuck': np.where(self.bad_luck == NO_SCORE, 0, self.bad_luck),
+            'MaxDeck': max_deck,
+            'MaxPhoenix': self.phoenix.copy(),
+            'CurrentNoCarrot': self.current[20].copy(),
+            'MaxNoCarrot': self.best_streak[20].copy(),
+            'MaxAlien': self.best_streak[60].copy(),
+            'Bonus_Gained': self.sums['bonus_gain'].copy(), 'Best_Bonus': self.best_bonus.copy(), 'Worst_Bonus': self.worst_bonus.copy(),
+            'Avg_Bonus': avg_bonus, 'Momentum': last5 - moyenne,
+            'ProgressionPct': np.where(moyenne > 0, (l15 - moyenne) / np.where(moyenne > 0, moyenne, 1) * 100, 0),
+            'ReliabilityPct': (games - c['carrots']) / games * 100, 'AvgZ': self.sum_z / games,
+            'Trend': [[v for _, v in hist] for hist in self.history],
+            'AvgWithBonus': avg_bonus, 'AvgWithoutBonus': avg_plain, 'BonusPlayed': bonus_n.copy(),
+            'ModeScore': self.score_counts.argmax(axis=1) + self.score_min, 'ModeCount': self.score_counts.max(axis=1),
+            'Spread': self.best - self.worst,
+            'Trend7Icon': np.where(diff_7 >= 1, "↗️", np.where(diff_7 <= -1, "↘️", "➡️"))
         })
-    return pd.DataFrame(stats)
+
+
+# --- STATS PAR PÉRIODE (SEASONS_CONFIG) ---
+# Toutes les périodes commencées + la saison complète sont calculées une fois
+# par version des données (df.attrs['fingerprint']) : changer de période dans
+# la sidebar ou afficher les trophées du Hall of Fame devient une lecture.
+# Une période terminée (dernier pick > fin) ne peut plus bouger : elle est
+# gardée pour toute la saison, quelle que soit la version.
+
+@st.cache_resource(show_spinner=False)
+def _period_store():
+    return {'lock': threading.Lock(), 'version': None, 'live': {}, 'finished': {}}
+
+
+def _period_slice(df_full, bounds):
+    return pick_slice(df_full, bounds[0], bounds[1])
+
+
+def _period_table(entry, metrics):
+    """Colonnes demandées d'une entrée du store (contexte paresseux ou tableau saison)."""
+    if isinstance(entry, MetricContext):
+        return entry.frame(metrics)
+    if metrics is None or entry.empty:
+        return entry
+    return entry[['Player'] + [c for c in entry.columns if c in set(metrics)]]
+
+
+def period_stats(df_full, bp_map, daily_max_map, period, season_stats=None, metrics=None):
+    """
+    compute_stats de la période `period` (clé de SEASONS_CONFIG) sur la saison
+    df_full. season_stats : tableau saison complète déjà disponible (loader).
+    metrics : colonnes voulues (toutes par défaut), calculées à la demande.
+    Retourne un DataFrame vide si la période n'a pas commencé.
+    """
+    version = df_full.attrs.get('fingerprint')
+    if version is None or df_full.empty:
+        # Frame sans version (reconstruite) : pas de cache possible
+        return compute_stats(_period_slice(df_full, SEASONS_CONFIG[period]), bp_map, daily_max_map, metrics)
+
+    store = _period_store()
+    latest_pick = int(df_full['Pick'].max())
+    with store['lock']:
+        if store['version'] != version:
+            # Un contexte par période commencée : rien n'est calculé ici, chaque
+            # page ne paie que ses colonnes (mémorisées dans le contexte)
+            live = {}
+            for name, bounds in SEASONS_CONFIG.items():
+                if latest_pick < bounds[0]:
+                    continue
+                finished_key = (SEASON_ID, name, bounds)
+                if latest_pick > bounds[1] and finished_key in store['finished']:
+                    continue
+                if season_stats is not None and bounds[0] <= int(df_full['Pick'].min()) and bounds[1] >= latest_pick:
+                    entry = season_stats
+                else:
+                    entry = MetricContext(_period_slice(df_full, bounds), bp_map, daily_max_map)
+                if latest_pick > bounds[1]:
+                    store['finished'][finished_key] = entry
+                else:
+                    live[name] = entry
+            store['live'] = live
+            store['version'] = version
+
+        finished_key = (SEASON_ID, period, SEASONS_CONFIG[period])
+        entry = store['finished'].get(finished_key, store['live'].get(period))
+    if entry is None:
+        return pd.DataFrame()
+    return _period_table(entry, metrics)
+
+
+# --- CLASSEMENT APRÈS CHAQUE PICK (TIMELINE) ---
+# Points cumulés joueurs x picks (sommes cumulées du moteur de forme) et rang
+# de chaque joueur après chaque pick, calculés une fois par version et par
+# tranche de picks. Évolution du classement sur n'importe quel recul = lecture
+# de deux lignes ; la course au titre se dessine depuis la même matrice.
+
+@cache_by_version(max_entries=8)
+def standings_timeline(df):
+    """
+    {'Points', 'Games', 'Rank'} : DataFrames picks x joueurs (cumul depuis le
+    début de df). Rang NaN tant que le joueur n'a pas joué (ex-aequo : rang moyen).
+    """
+    form = rolling_form(df)
+    points, games = form.cumulative(BY_PICK)
+    picks = pd.RangeIndex(form.first_pick, form.first_pick + points.shape[1], name='Pick')
+    points = pd.DataFrame(points.T, index=picks, columns=form.players)
+    games = pd.DataFrame(games.T, index=picks, columns=form.players)
+    rank = points.where(games > 0).rank(axis=1, ascending=False)
+    return {'Points': points, 'Games': games, 'Rank': rank}
+
+
+def standings_at(df, pick):
+    """
+    Classement après le pick `pick` : Points, Games, Rank par joueur ayant joué
+    (index = Player trié). Vide avant le premier pick de df.
+    """
+    timeline = standings_timeline(df)
+    row = timeline['Points'].index.searchsorted(pick, side='right') - 1
+    if row < 0:
+        return pd.DataFrame(columns=['Points', 'Games', 'Rank'])
+    out = pd.DataFrame({name: table.iloc[row] for name, table in timeline.items()}).rename_axis('Player')
+    return out[out['Games'] > 0].sort_index()
+
 
 def get_comparative_stats(df, current_pick, lookback=15):
     start_pick = max(1, current_pick - lookback)
-    current_stats = df.groupby('Player')['Score'].agg(['sum', 'mean'])
-    current_stats['rank'] = current_stats['sum'].rank(ascending=False)
-    df_past = df[df['Pick'] <= start_pick]
-    if df_past.empty: return pd.DataFrame() 
-    past_stats = df_past.groupby('Player')['Score'].agg(['sum', 'mean'])
-    past_stats['rank'] = past_stats['sum'].rank(ascending=False)
-    stats_delta = pd.DataFrame(index=current_stats.index)
-    stats_delta['mean_diff'] = current_stats['mean'] - past_stats['mean']
-    stats_delta['rank_diff'] = past_stats['rank'] - current_stats['rank'] 
+    current = standings_at(df, df['Pick'].max())
+    past = standings_at(df, start_pick)
+    if past.empty: return pd.DataFrame()
+    stats_delta = pd.DataFrame(index=current.index)
+    stats_delta['mean_diff'] = current['Points'] / current['Games'] - past['Points'] / past['Games']
+    stats_delta['rank_diff'] = past['Rank'] - current['Rank']
     return stats_delta
 
-# --- NOUVELLE FONCTION POUR LE DUEL ---
+# --- MATRICE FACE À FACE (TOUS LES DUELS) ---
+# Une passe sur la matrice dense joueurs x picks (NaN = pas joué) : pour chaque
+# paire, victoires / égalités sur les picks joués par les deux. Mise en cache
+# par version des données et tranche de picks (période) : un duel devient une
+# lecture, et la grille de tout l'effectif se dessine sans recalcul.
+
+H2H_CHUNK_CELLS = 1 << 24  # Comparaisons par bloc de picks (borne mémoire P x P x picks)
+
+
+@cache_by_version(max_entries=16)
+def head_to_head_matrix(df):
+    """
+    {'Wins', 'Ties', 'Played'} : DataFrames joueurs x joueurs (index trié).
+    Wins.loc[a, b] = picks où a a battu b ; défaites de a = Wins.loc[b, a].
+    """
+    players = np.sort(df['Player'].unique().astype(object))
+    codes = pd.Index(players).get_indexer(df['Player'])
+    pick_codes, _ = pd.factorize(df['Pick'], sort=True)
+    n_players, n_picks = len(players), int(pick_codes.max()) + 1 if len(df) else 0
+
+    scores = np.full((n_players, n_picks), np.nan)
+    scores[codes, pick_codes] = df['Score'].to_numpy(dtype=float)
+    played = ~np.isnan(scores)
+
+    # NaN > x est faux : seuls les picks joués par les deux comptent
+    wins = np.zeros((n_players, n_players), dtype=np.int64)
+    step = max(1, H2H_CHUNK_CELLS // max(1, n_players * n_players))
+    for lo in range(0, n_picks, step):
+        block = scores[:, lo:lo + step]
+        wins += (block[:, None, :] > block[None, :, :]).sum(axis=2)
+    mutual = played.astype(np.int64) @ played.T.astype(np.int64)
+
+    frame = lambda values: pd.DataFrame(values, index=pd.Index(players, name='Player'), columns=players)
+    return {'Wins': frame(wins), 'Ties': frame(mutual - wins - wins.T), 'Played': frame(mutual)}
+
+
 def get_head_to_head_stats(df, p1, p2):
-    # On filtre uniquement les données des deux joueurs
-    df_filtered = df[df['Player'].isin([p1, p2])]
-    
-    # On pivote pour avoir : Index=Pick, Colonnes=Joueurs, Valeur=Score
-    # dropna() permet de ne garder que les picks où LES DEUX ont joué
-    pivot = df_filtered.pivot_table(index='Pick', columns='Player', values='Score').dropna()
-    
-    if pivot.empty or p1 not in pivot.columns or p2 not in pivot.columns:
+    """Victoires de p1 et de p2 sur les picks joués par les deux (lecture de la matrice)."""
+    wins = head_to_head_matrix(df)['Wins']
+    if p1 not in wins.index or p2 not in wins.index:
         return 0, 0
-    
-    # Calcul des victoires
-    wins_p1 = (pivot[p1] > pivot[p2]).sum()
-    wins_p2 = (pivot[p2] > pivot[p1]).sum()
-    
-    return wins_p1, wins_p2
+    return int(wins.at[p1, p2]), int(wins.at[p2, p1])
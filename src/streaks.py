@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+from src.aggregates import pick_table
+
+# --- MOTEUR DE SÉRIES (RUN-LENGTH VECTORISÉ) ---
+# Une série = nombre de picks consécutifs (dans l'ordre des picks joués) où la
+# valeur atteint un seuil. Tout est calculé par segment (un segment = un joueur,
+# ou la série d'équipe entière) sur des tableaux NumPy triés, sans boucle Python.
+
+
+def run_lengths(mask, starts):
+    """
+    Longueur de la série de True se terminant à chaque ligne, remise à zéro à
+    chaque False et au début de chaque segment (starts = indices de début).
+    """
+    pos = np.arange(len(mask))
+    anchor = np.where(mask, -1, pos)
+    # Début de segment : la série ne peut pas remonter au segment précédent
+    anchor[starts] = np.where(mask[starts], starts - 1, starts)
+    last_break = np.maximum.accumulate(anchor)
+    return np.where(mask, pos - last_break, 0)
+
+
+def segment_streaks(mask, starts, ends):
+    """(série en cours, meilleure série) de chaque segment non vide."""
+    runs = run_lengths(mask, starts)
+    return runs[ends - 1], np.maximum.reduceat(runs, starts)
+
+
+def _segments(df, by):
+    """Tri (groupe, Pick) de df : (ordre, codes triés, groupes, débuts, fins de segment)."""
+    picks = df['Pick'].to_numpy()
+    if by is None:
+        codes, groups = np.zeros(len(df), dtype=np.int64), pd.Index(['Team'])
+    else:
+        codes, groups = pd.factorize(df[by])
+    order = np.lexsort((picks, codes))
+    codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)]
+    return order, codes, groups, starts, ends
+
+
+def compute_streaks(df, thresholds, by='Player', value='Score', as_of=None):
+    """
+    Séries en cours et records pour chaque seuil, en un seul appel.
+    df : une ligne par (groupe, Pick) ; by=None = une seule série (ex: team_series).
+    as_of : ne considère que les picks <= as_of (série "à date").
+    Retourne un DataFrame indexé par groupe (ou 'Team') avec Current<seuil> / Max<seuil>.
+    """
+    if as_of is not None:
+        df = df[df['Pick'] <= as_of]
+    if df.empty:
+        return pd.DataFrame()
+
+    order, codes, groups, starts, ends = _segments(df, by)
+    values = df[value].to_numpy()[order]
+
+    result = {}
+    for t in thresholds:
+        current, best = segment_streaks(values >= t, starts, ends)
+        result[f'Current{t}'] = current
+        result[f'Max{t}'] = best
+    return pd.DataFrame(result, index=pd.Index(np.asarray(groups, dtype=object)[codes[starts]], name=by))
+
+
+def streak_history(df, thresholds, by='Player', value='Score'):
+    """
+    Séries "à date" de chaque ligne de df, en un seul passage : Current<seuil> /
+    Max<seuil> valent compute_streaks(df, ..., as_of=pick de la ligne) pour le
+    groupe de la ligne. Même index que df.
+    """
+    if df.empty:
+        return pd.DataFrame(index=df.index)
+    order, codes, _, starts, _ = _segments(df, by)
+    values = df[value].to_numpy()[order]
+
+    # Record courant : maximum cumulé des séries, remis à zéro à chaque segment
+    # (décalage par segment : les séries sont < len(df))
+    offset = codes.astype(np.int64) * (len(df) + 1)
+    result = {}
+    for t in thresholds:
+        runs = run_lengths(values >= t, starts)
+        best = np.maximum.accumulate(runs + offset) - offset
+        current_col, best_col = np.empty_like(runs), np.empty_like(best)
+        current_col[order], best_col[order] = runs, best
+        result[f'Current{t}'] = current_col
+        result[f'Max{t}'] = best_col
+    return pd.DataFrame(result, index=df.index)
+
+
+# Agrégats de Score déjà présents dans la table par pick
+_PICK_TABLE_AGGS = {'min': 'Min', 'max': 'Max', 'sum': 'Total', 'mean': 'Mean'}
+
+
+def team_series(df, agg='min', value='Score'):
+    """Valeur d'équipe par pick (min = le moins bon score du soir, sum = total...)."""
+    if value == 'Score' and agg in _PICK_TABLE_AGGS and not df.empty:
+        column = pick_table(df)[_PICK_TABLE_AGGS[agg]]
+        return pd.DataFrame({'Pick': column.index.to_numpy(), value: column.to_numpy()})
+    return df.groupby('Pick', as_index=False)[value].agg(agg)
+
+
+def team_streaks(df, thresholds, agg='min', as_of=None):
+    """Séries d'équipe : avec agg='min' et seuil 20, 'personne n'a pris de carotte'."""
+    table = compute_streaks(team_series(df, agg), thresholds, by=None, as_of=as_of)
+    if table.empty:
+        return pd.Series({f'{kind}{t}': 0 for t in thresholds for kind in ('Current', 'Max')})
+    return table.iloc[0]
@@ -5,7 +5,11 @@ import unicodedata
 
 # --- CONSTANTES ---
 DISCORD_COLOR_RED = 13504833  # #CE1141 (Raptors Red)
-WEBHOOK_URL = st.secrets["DISCORD_WEBHOOK"] if "DISCORD_WEBHOOK" in st.secrets else ""
+try:
+    WEBHOOK_URL = st.secrets["DISCORD_WEBHOOK"] if "DISCORD_WEBHOOK" in st.secrets else ""
+except Exception:
+    # Pas de secrets.toml (replica locale, benchmarks, CI)
+    WEBHOOK_URL = ""
 
 # --- FONCTION DE NETTOYAGE ---
 def normalize_month(month_str):
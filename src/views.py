@@ -10,8 +10,32 @@ import datetime # Nécessaire pour l'heure d'envoi
 from src.config import *
 from src.ui import kpi_card, section_title, render_gauge
 from src.utils import get_uniform_color, send_weekly_report_discord, format_winners_list
-from src.stats import compute_stats, get_head_to_head_stats
+from src.stats import compute_stats, get_head_to_head_stats, head_to_head_matrix, standings_timeline, standings_at
 from src.weekly import generate_weekly_report_data
+from src.archive import past_seasons, build_all_time
+from src.streaks import team_streaks
+from src.aggregates import pick_table, pick_slice
+from src.rolling import rolling_form
+from src.odds import title_odds, FORM_PICKS
+from src.cube import rollup, level_totals
+
+# --- MÉTRIQUES LUES PAR PAGE ---
+# Colonnes de full_stats affichées par chaque vue : seules celles-ci sont
+# calculées (registre src/metrics.py). Ajouter ici toute nouvelle colonne lue.
+PAGE_METRICS = {
+    "Dashboard": ['Total', 'Moyenne', 'Last15'],
+    "Team HQ": ['Total', 'Moyenne', 'Carottes', 'Nukes', 'BP_Count', 'Bonus_Gained', 'Trend', 'Trend7Icon'],
+    "Player Lab": ['Total', 'Moyenne', 'Moyenne_Raw', 'StdDev', 'Best', 'Best_Raw', 'Worst', 'Last10', 'Last15',
+                   'Count35', 'Carottes', 'Nukes', 'BP_Count', 'Alpha_Count', 'CurrentNoCarrot', 'Avg_Bonus', 'ReliabilityPct'],
+}
+NO_CARROT_METRICS = ['Carottes', 'CurrentNoCarrot', 'MaxNoCarrot']
+HOF_METRICS = [
+    'Moyenne', 'Moyenne_Raw', 'StdDev', 'Best', 'Best_Raw', 'Worst', 'Worst_Raw', 'Last15', 'Count30', 'Count40',
+    'Carottes', 'Nukes', 'BP_Count', 'Alpha_Count', 'MaxUnstoppable', 'PrimeTime', 'IronLungs', 'SixthMan',
+    'Medalist', 'ShieldCount', 'Dominator', 'SaviorScore', 'Soloist', 'Ghost', 'Braqueur', 'BadLuck', 'MaxDeck',
+    'MaxPhoenix', 'MaxNoCarrot', 'MaxAlien', 'Bonus_Gained', 'Worst_Bonus', 'ProgressionPct', 'ReliabilityPct',
+    'ModeScore', 'ModeCount', 'Spread',
+]
 
 # --- 1. DASHBOARD ---
 def render_dashboard(day_df, full_stats, latest_pick, team_avg_per_pick, team_streak_nc, df):
@@ -53,10 +77,11 @@ def render_dashboard(day_df, full_stats, latest_pick, team_avg_per_pick, team_st
         
         # --- RESTAURATION DES COULEURS ---
         # On applique la fonction get_uniform_color (qui est dans src.utils et renvoie Rouge/Gris/Vert)
-        day_df['BarColor'] = day_df['Score'].apply(get_uniform_color)
+        # (colonne ajoutée sur une frame dérivée : day_df reste en lecture seule)
+        bars = day_df.assign(BarColor=day_df['Score'].apply(get_uniform_color))
         
         # On utilise color_discrete_map="identity" pour dire à Plotly d'utiliser les codes hexadécimaux de la colonne BarColor
-        fig = px.bar(day_df, x='Player', y='Score', text='Score', color='BarColor', color_discrete_map="identity")
+        fig = px.bar(bars, x='Player', y='Score', text='Score', color='BarColor', color_discrete_map="identity")
         
         fig.update_traces(textposition='outside', marker_line_width=0, textfont_size=14, textfont_family="Rajdhani", cliponaxis=False)
         fig.add_hline(y=team_avg_per_pick, line_dash="dot", line_color=C_TEXT, annotation_text="Moy. Team", annotation_position="top right")
@@ -75,8 +100,9 @@ def render_dashboard(day_df, full_stats, latest_pick, team_avg_per_pick, team_st
     c_gen, c_form, c_text = st.columns(3)
     medals = {0: "🥇", 1: "🥈", 2: "🥉"}
 
-    df_minus_last = df[df['Pick'] < latest_pick].groupby('Player')['Score'].sum().rank(ascending=False)
-    current_ranks = full_stats.set_index('Player')['Total'].rank(ascending=False)
+    # Rangs avant / après le dernier pick : lignes de la timeline du classement
+    df_minus_last = standings_at(df, latest_pick - 1)['Rank']
+    current_ranks = standings_at(df, latest_pick)['Rank']
 
     with c_gen:
         st.markdown(f"<div class='glass-card' style='height:100%'><div style='color:{C_ACCENT}; font-family:Rajdhani; font-weight:700; margin-bottom:5px'>🏆 TOP 5 PÉRIODE</div><div class='chart-desc'>Classement de la période sélectionnée.</div>", unsafe_allow_html=True)
@@ -107,8 +133,7 @@ def render_dashboard(day_df, full_stats, latest_pick, team_avg_per_pick, team_st
 
         bins = [-1, 19, 39, 200]
         labels = ['< 20', '20-39', '40+']
-        day_df['Range'] = pd.cut(day_df['Score'], bins=bins, labels=labels)
-        dist_counts = day_df['Range'].value_counts().reset_index()
+        dist_counts = pd.cut(day_df['Score'], bins=bins, labels=labels).rename('Range').value_counts().reset_index()
         dist_counts.columns = ['Range', 'Count']
 
         color_map = {'< 20': C_RED, '20-39': "#374151", '40+': C_GREEN}
@@ -122,12 +147,13 @@ def render_dashboard(day_df, full_stats, latest_pick, team_avg_per_pick, team_st
 # --- 2. TEAM HQ ---
 def render_team_hq(df, latest_pick, team_rank, team_history, team_avg_per_pick, total_bp_team, full_stats):
     section_title("TEAM <span class='highlight'>HQ</span>", "Vue d'ensemble de l'effectif")
-    total_pts_season = df['Score'].sum()
-    daily_agg = df.groupby('Pick')['Score'].sum()
+    team = pick_table(df)
+    total_pts_season = team['Total'].sum()
+    daily_agg = team['Total']
     best_night = daily_agg.max(); worst_night = daily_agg.min(); avg_night = daily_agg.mean()
 
-    total_nukes_team = len(df[df['Score'] >= 50])
-    total_carrots_team = len(df[df['Score'] < 20])
+    total_nukes_team = int(team['Nukes'].sum())
+    total_carrots_team = int(team['Carrots'].sum())
     safe_zone_team = len(df[df['Score'] > 35])
 
     total_bonus_played = len(df[df['IsBonus'] == True])
@@ -135,7 +161,7 @@ def render_team_hq(df, latest_pick, team_rank, team_history, team_avg_per_pick,
     best_rank_ever = f"#{min(team_history)}" if len(team_history) > 0 else "-"
     bonus_df = df[df['IsBonus'] == True]
     avg_bonus_team = bonus_df['Score'].mean() if not bonus_df.empty else 0
-    daily_totals = df.groupby('Pick')['Score'].sum()
+    daily_totals = daily_agg
     avg_team_15 = daily_totals[daily_totals.index > (latest_pick - 15)].mean() if len(daily_totals) > 15 else daily_totals.mean()
 
     k1, k2, k3, k4 = st.columns(4)
@@ -179,23 +205,29 @@ def render_team_hq(df, latest_pick, team_rank, team_history, team_avg_per_pick,
     st.markdown("<div class='chart-desc'>Cliquez sur ▶️ pour lancer la course. L'animation est fluide et gérée par le navigateur.</div>", unsafe_allow_html=True)
 
     if not df.empty:
-        pivoted = df.pivot_table(index='Pick', columns='Player', values='Score', aggfunc='sum').fillna(0)
-        cum_df = pivoted.cumsum()
-        race_df = cum_df.reset_index().melt(id_vars='Pick', var_name='Player', value_name='Total')
-        race_df = race_df.sort_values('Pick')
-        global_max = race_df['Total'].max() * 1.1
-
-        fig_race = px.bar(
-            race_df,
-            x="Total",
-            y="Player",
-            color="Player",
-            text="Total",
-            orientation='h',
-            animation_frame="Pick",
-            animation_group="Player",
-            range_x=[0, global_max],
-            color_discrete_map=PLAYER_COLORS
+        # Une image par pick, lue dans la timeline du classement (points cumulés) :
+        # une seule trace de barres par image au lieu d'une trace par joueur
+        timeline = standings_timeline(df)
+        cum_df = timeline['Points'].loc[pick_table(df).index]
+        players = cum_df.columns.tolist()
+        palette = px.colors.qualitative.Plotly
+        bar_colors = [PLAYER_COLORS.get(p, palette[i % len(palette)]) for i, p in enumerate(players)]
+        global_max = cum_df.to_numpy().max() * 1.1
+
+        def race_bar(totals):
+            return go.Bar(x=totals, y=players, text=totals, orientation='h', marker_color=bar_colors, hovertemplate="%{y} : %{x}<extra></extra>")
+
+        frames = [go.Frame(data=[race_bar(row)], name=str(pick)) for pick, row in zip(cum_df.index, cum_df.to_numpy())]
+        fig_race = go.Figure(data=frames[0].data, frames=frames)
+        fig_race.update_layout(
+            updatemenus=[dict(type="buttons", direction="left", x=0.1, y=0, xanchor="right", yanchor="top", pad={"r": 10, "t": 70}, showactive=False, buttons=[
+                dict(label="▶", method="animate", args=[None, {"frame": {"duration": 500, "redraw": True}, "mode": "immediate", "fromcurrent": True, "transition": {"duration": 500, "easing": "linear"}}]),
+                dict(label="◼", method="animate", args=[[None], {"frame": {"duration": 0, "redraw": True}, "mode": "immediate", "fromcurrent": True, "transition": {"duration": 0, "easing": "linear"}}]),
+            ])],
+            sliders=[dict(active=0, x=0.1, y=0, xanchor="left", yanchor="top", len=0.9, pad={"b": 10, "t": 60}, currentvalue={"prefix": "Pick="}, steps=[
+                dict(label=frame.name, method="animate", args=[[frame.name], {"frame": {"duration": 0, "redraw": True}, "mode": "immediate", "fromcurrent": True, "transition": {"duration": 0, "easing": "linear"}}])
+                for frame in frames
+            ])],
         )
 
         fig_race.update_layout(
@@ -219,6 +251,16 @@ def render_team_hq(df, latest_pick, team_rank, team_history, team_avg_per_pick,
         fig_race.update_traces(textposition='outside', marker_line_width=0, textfont_size=14, textfont_color="#FFF")
         st.plotly_chart(fig_race, use_container_width=True)
 
+        st.markdown("### 🪜 ÉVOLUTION DU CLASSEMENT")
+        st.markdown("<div class='chart-desc'>Rang de chaque joueur après chaque pick (1 = leader).</div>", unsafe_allow_html=True)
+        ranks = timeline['Rank'].loc[cum_df.index]
+        fig_ranks = go.Figure([
+            go.Scatter(x=ranks.index, y=ranks[p], name=p, mode='lines', line=dict(color=color, width=2), hovertemplate=f"{p} : %{{y:.0f}}e<extra></extra>")
+            for p, color in zip(players, bar_colors)
+        ])
+        fig_ranks.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font={'color': '#AAA'}, xaxis=dict(showgrid=False, title="Pick #"), yaxis=dict(autorange='reversed', showgrid=True, gridcolor='#222', title="Rang", dtick=1), height=450, legend=dict(orientation="h", y=-0.2, font=dict(color="#E5E7EB")), margin=dict(l=0, r=0, t=10, b=0))
+        st.plotly_chart(fig_ranks, use_container_width=True)
+
     st.markdown("<div style='height: 40px;'></div>", unsafe_allow_html=True)
 
     st.markdown("### 🔥 HEATMAP")
@@ -229,7 +271,7 @@ def render_team_hq(df, latest_pick, team_rank, team_history, team_avg_per_pick,
     if heat_filter == "VUE GLOBALE": df_heat = df
     else: df_heat = df[df['Month'] == heat_filter]
 
-    heatmap_data = df_heat.pivot_table(index='Player', columns='Pick', values='Score', aggfunc='sum')
+    heatmap_data = df_heat.pivot_table(index='Player', columns='Pick', values='Score', aggfunc='sum', observed=True)
     custom_colors = [[0.0, '#EF4444'], [0.43, '#1F2937'], [0.56, '#1F2937'], [1.0, '#10B981']]
 
     fig_heat = px.imshow(heatmap_data, labels=dict(x="Pick", y="Player", color="Score"), x=heatmap_data.columns, y=heatmap_data.index, color_continuous_scale=custom_colors, zmin=0, zmax=80, aspect="auto")
@@ -246,7 +288,7 @@ def render_team_hq(df, latest_pick, team_rank, team_history, team_avg_per_pick,
             "Player": st.column_config.TextColumn("Joueur", width="medium"),
             "Trend7Icon": st.column_config.TextColumn("7J", width="small", help="Tendance 7 derniers matchs"),
             "Trend": st.column_config.LineChartColumn("Forme (20j)", width="medium", y_min=0, y_max=80),
-            "Total": st.column_config.ProgressColumn("Total Pts", format="%d", min_value=0, max_value=full_stats['Total'].max()),
+            "Total": st.column_config.ProgressColumn("Total Pts", format="%d", min_value=0, max_value=int(full_stats['Total'].max())),
             "Moyenne": st.column_config.NumberColumn("Moyenne", format="%.1f"),
             "Carottes": st.column_config.NumberColumn("🥕", help="Scores < 20"),
             "Nukes": st.column_config.NumberColumn("☢️", help="Scores > 50"),
@@ -454,19 +496,37 @@ def render_player_lab(df, full_stats):
         comp_row("FIABILITÉ", stat1['ReliabilityPct'], stat2['ReliabilityPct'], "{:.0f}%")
         st.markdown("</div>", unsafe_allow_html=True)
 
+    # GRILLE FACE À FACE : tous les duels de l'effectif (lecture de la matrice en cache)
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("<h3 style='margin-bottom:15px'>🕸️ GRILLE FACE À FACE</h3>", unsafe_allow_html=True)
+    st.markdown(f"<div class='chart-desc'>% de victoires du joueur en ligne contre le joueur en colonne (picks joués par les deux). Survol : bilan V-N-D.</div>", unsafe_allow_html=True)
+
+    h2h = head_to_head_matrix(df)
+    roster = full_stats.sort_values('Total', ascending=False)['Player'].tolist()
+    wins = h2h['Wins'].loc[roster, roster]
+    played = h2h['Played'].loc[roster, roster]
+    win_pct = (wins / played.where(played > 0) * 100).round(0)
+    record = wins.astype(str) + "-" + h2h['Ties'].loc[roster, roster].astype(str) + "-" + wins.T.astype(str)
+
+    fig_h2h = px.imshow(win_pct, labels=dict(x="Adversaire", y="Joueur", color="% Victoires"), x=roster, y=roster, color_continuous_scale=[[0.0, C_RED], [0.5, C_DARK_GREY], [1.0, C_GREEN]], zmin=0, zmax=100, aspect="auto", text_auto=True)
+    fig_h2h.update_traces(customdata=record.to_numpy(), hovertemplate="%{y} vs %{x}<br>%{z:.0f}% (%{customdata})<extra></extra>", xgap=1, ygap=1)
+    fig_h2h.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font={'color': '#AAA'}, height=max(400, 28 * len(roster)), xaxis={'showgrid': False, 'side': 'top'}, yaxis={'showgrid': False}, margin=dict(l=0, r=0, t=30, b=0))
+    st.plotly_chart(fig_h2h, use_container_width=True)
+
 # --- 4. BONUS X2 ---
 def render_bonus_x2(df):
     # MODIFICATION: On force l'utilisation de df_full_history passé en argument depuis app.py
     # (Note: ici df est déjà df_full_history grâce au câblage dans app.py)
     section_title("BONUS <span class='highlight'>ZONE</span>", "Analyse de Rentabilité")
     
-    df_bonus = df[df['IsBonus'] == True].copy()
+    df_bonus = df[df['IsBonus'] == True]
     
-    # Calcul du Gain Réel
-    df_bonus['RealGain'] = df_bonus['Score'] - df_bonus['ScoreVal']
-    
-    # Indicateur visuel de rentabilité (Rentable si score de base >= 40, donc score total >= 80)
-    df_bonus['Rentable'] = df_bonus['ScoreVal'].apply(lambda x: "✅" if x >= 40 else "❌")
+    # Calcul du Gain Réel + indicateur visuel de rentabilité (Rentable si score de
+    # base >= 40, donc score total >= 80) : colonnes ajoutées sur une frame dérivée
+    df_bonus = df_bonus.assign(
+        RealGain=df_bonus['Score'] - df_bonus['ScoreVal'],
+        Rentable=df_bonus['ScoreVal'].apply(lambda x: "✅" if x >= 40 else "❌"),
+    )
 
     available_months = df['Month'].unique().tolist()
     sel_month = st.selectbox("Filtrer par Mois", ["Tous"] + [m for m in available_months if m != "Inconnu"])
@@ -493,7 +553,8 @@ def render_bonus_x2(df):
         c_chart1, c_chart2 = st.columns([2, 3], gap="medium")
         with c_chart1:
             st.markdown("#### 💰 IMPACT MENSUEL (GAINS RÉELS)")
-            monthly_gain = df_bonus.groupby('Month')['RealGain'].sum().reset_index()
+            months = level_totals(rollup(df, 'Month'))
+            monthly_gain = months.loc[months['BonusPlayed'] > 0, ['Bonus_Gained']].rename(columns={'Bonus_Gained': 'RealGain'}).reset_index()
             # Tri chronologique sécurisé
             month_order = ['octobre', 'novembre', 'decembre', 'janvier', 'fevrier', 'mars', 'avril']
             existing_months = [m for m in month_order if m in monthly_gain['Month'].unique()]
@@ -546,25 +607,12 @@ def render_no_carrot(df, team_streak_nc, full_stats, df_full_history):
     section_title("ANTI <span class='highlight'>CARROTE</span>", "Objectif Fiabilité & Constance")
     
     # 1. CALCULS SUR FULL HISTORY (Saison Complète)
-    max_streak_team_hist = 0
-    curr_str = 0
-    sorted_picks_asc = sorted(df_full_history['Pick'].unique())
-    
-    team_streak_active = 0
-    for p_id in sorted(df_full_history['Pick'].unique(), reverse=True):
-        d_min = df_full_history[df_full_history['Pick'] == p_id]['Score'].min()
-        if d_min >= 20: team_streak_active += 1
-        else: break
-            
-    for p_id in sorted_picks_asc:
-        d_min = df_full_history[df_full_history['Pick'] == p_id]['Score'].min()
-        if d_min >= 20: curr_str += 1
-        else:
-            if curr_str > max_streak_team_hist: max_streak_team_hist = curr_str
-            curr_str = 0
-    if curr_str > max_streak_team_hist: max_streak_team_hist = curr_str
+    # Série d'équipe = soirs consécutifs où le moins bon score du soir est >= 20
+    team_nc = team_streaks(df_full_history, [20])
+    team_streak_active = int(team_nc['Current20'])
+    max_streak_team_hist = int(team_nc['Max20'])
 
-    full_stats_global = compute_stats(df_full_history, {}, {})
+    full_stats_global = compute_stats(df_full_history, {}, {}, NO_CARROT_METRICS)
     
     iron_man_curr = full_stats_global.sort_values('CurrentNoCarrot', ascending=False).iloc[0]
     iron_man_all_time = full_stats_global.sort_values('MaxNoCarrot', ascending=False).iloc[0]
@@ -581,9 +629,7 @@ def render_no_carrot(df, team_streak_nc, full_stats, df_full_history):
     c_graph, c_list = st.columns([2, 1], gap="large")
     with c_graph:
         st.markdown("#### 📉 ZONE DE DANGER (CAROTTES PAR SOIR - SAISON)")
-        carrot_counts = df_full_history[df_full_history['Score'] < 20].groupby('Pick').size().reset_index(name='Carottes')
-        all_picks = pd.DataFrame({'Pick': sorted(df_full_history['Pick'].unique())})
-        carrot_chart = pd.merge(all_picks, carrot_counts, on='Pick', how='left').fillna(0)
+        carrot_chart = pick_table(df_full_history)['Carrots'].rename('Carottes').reset_index()
         carrot_chart['Color'] = carrot_chart['Carottes'].apply(lambda x: "#374151" if x == 0 else C_RED)
         
         # Trouver le pire soir pour l'annotation
@@ -617,15 +663,17 @@ def render_no_carrot(df, team_streak_nc, full_stats, df_full_history):
 # --- 6. TRENDS ---
 def render_trends(df, latest_pick):
     section_title("TENDANCES", "Analyse de la forme récente (15 derniers jours)")
-    df_15 = df[df['Pick'] > (latest_pick - 15)]
-    team_daily_15 = df_15.groupby('Pick')['Score'].sum()
+    df_15 = pick_slice(df, latest_pick - 14, latest_pick)
+    team_daily_season = pick_table(df)['Total'].rename('Score')
+    team_daily_15 = team_daily_season[team_daily_season.index > (latest_pick - 15)]
     avg_15_team = team_daily_15.mean()
-    team_daily_season = df.groupby('Pick')['Score'].sum()
     season_avg_team = team_daily_season.mean()
     team_trend_diff = ((avg_15_team - season_avg_team) / season_avg_team) * 100
-    best_form_player = df_15.groupby('Player')['Score'].mean().idxmax()
-    best_form_val = df_15.groupby('Player')['Score'].mean().max()
-    avg_15_indiv = df_15['Score'].mean()
+    form = rolling_form(df)
+    form_15 = form.form(15)
+    best_form_player = form_15['Moyenne'].idxmax()
+    best_form_val = form_15['Moyenne'].max()
+    avg_15_indiv = form_15['Total'].sum() / form_15['Games'].sum()
     max_team_15 = team_daily_15.max()
 
     k1, k2, k3, k4, k5 = st.columns(5)
@@ -645,9 +693,9 @@ def render_trends(df, latest_pick):
     st.plotly_chart(fig_team_15, use_container_width=True)
 
     # Calcul dynamique Top 3 / Flop 3 (SANS FILTRE STRICT)
-    player_season_avg = df.groupby('Player')['Score'].mean()
+    player_season_avg = form.form()['Moyenne']
     # On regarde la forme sur les 7 derniers matchs pour plus de réactivité
-    player_7_avg = df[df['Pick'] > (latest_pick - 7)].groupby('Player')['Score'].mean()
+    player_7_avg = form.form(7)['Moyenne']
     
     delta_df = pd.DataFrame({'Season': player_season_avg, 'Recent': player_7_avg})
     delta_df['Delta'] = delta_df['Recent'] - delta_df['Season']
@@ -705,6 +753,8 @@ def render_hall_of_fame(df_full_history, bp_map, daily_max_map):
     trophy_cols = st.columns(4)
     season_keys = [k for k in SEASONS_CONFIG.keys() if "SAISON COMPLÈTE" not in k]
     real_latest_pick = df_full_history['Pick'].max() if not df_full_history.empty else 0
+    # Probabilités de titre (Monte Carlo, en cache par version des données)
+    odds = title_odds(df_full_history)
 
     for i, s_name in enumerate(season_keys):
         s_start, s_end = SEASONS_CONFIG[s_name]
@@ -724,11 +774,12 @@ def render_hall_of_fame(df_full_history, bp_map, daily_max_map):
         icon = "🔒"
         player_name = "VERROUILLÉ"
         score_val = "-"
+        odds_txt = ""
 
         if not is_future:
-            df_part = df_full_history[(df_full_history['Pick'] >= s_start) & (df_full_history['Pick'] <= s_end)]
-            if not df_part.empty:
-                leader = df_part.groupby('Player')['Score'].sum().sort_values(ascending=False).head(1)
+            parts = rollup(df_full_history, 'Part')
+            if s_name in parts.index.get_level_values('Part'):
+                leader = parts.loc[s_name, 'Total'].sort_index().sort_values(ascending=False).head(1)
                 if not leader.empty:
                     player_name = leader.index[0]
                     score_val = f"{int(leader.values[0])} pts"
@@ -738,14 +789,47 @@ def render_hall_of_fame(df_full_history, bp_map, daily_max_map):
             elif is_active:
                 card_bg = "linear-gradient(145deg, rgba(59, 130, 246, 0.1) 0%, rgba(0,0,0,0.4) 100%)"
                 border_col = C_BLUE; title_col = C_BLUE; icon = "🔥"
+                if s_name in odds:
+                    fav = odds[s_name].iloc[0]
+                    odds_txt = f"<div style='font-size:0.7rem; color:#888; margin-top:4px;'>🎲 {fav['Player']} {fav['Prob'] * 100:.0f}% de chances</div>"
 
         with trophy_cols[i]:
-            st.markdown(f"""<div style="background:{card_bg}; border:1px solid {border_col}; border-radius:10px; padding:15px; text-align:center; height:100%; position:relative;"><div style="font-size:0.7rem; color:#888;">{short_name}</div><div style="font-family:Rajdhani; font-weight:700; color:{title_col}; font-size:0.9rem;">{full_title}</div><div style="font-size:1.5rem; margin-bottom:5px;">{icon}</div><div style="font-family:Rajdhani; font-weight:800; color:#FFF; font-size:1.1rem;">{player_name}</div><div style="font-size:0.8rem; color:{title_col};">{score_val}</div></div>""", unsafe_allow_html=True)
+            st.markdown(f"""<div style="background:{card_bg}; border:1px solid {border_col}; border-radius:10px; padding:15px; text-align:center; height:100%; position:relative;"><div style="font-size:0.7rem; color:#888;">{short_name}</div><div style="font-family:Rajdhani; font-weight:700; color:{title_col}; font-size:0.9rem;">{full_title}</div><div style="font-size:1.5rem; margin-bottom:5px;">{icon}</div><div style="font-family:Rajdhani; font-weight:800; color:#FFF; font-size:1.1rem;">{player_name}</div><div style="font-size:0.8rem; color:{title_col};">{score_val}</div>{odds_txt}</div>""", unsafe_allow_html=True)
+
+    # PROBABILITÉS DE TITRE : saison complète + partie en cours
+    open_parts = [k for k, (s_start, s_end) in SEASONS_CONFIG.items() if s_start <= real_latest_pick <= s_end]
+    if open_parts and odds:
+        st.markdown("<div style='height: 30px;'></div>", unsafe_allow_html=True)
+        st.markdown("<h3 style='margin-bottom:10px; font-family:Rajdhani; color:#AAA;'>🎲 PROBABILITÉS DE TITRE</h3>", unsafe_allow_html=True)
+        odds_model = st.radio("Modèle", ["SAISON", "FORME (15 PICKS)"], horizontal=True, key="odds_model", label_visibility="collapsed")
+        if odds_model != "SAISON":
+            odds = title_odds(df_full_history, model='form')
+        n_sims_txt = f"{odds[open_parts[0]].attrs['simulations']:,}".replace(",", " ")
+        history_txt = "toute la saison" if odds_model == "SAISON" else f"{FORM_PICKS} derniers picks"
+        st.markdown(f"<div class='chart-desc'>{n_sims_txt} simulations des picks restants : scores tirés dans l'historique de chaque joueur ({history_txt}).</div>", unsafe_allow_html=True)
+        odds_cols = st.columns(len(open_parts))
+        for col, s_name in zip(odds_cols, open_parts):
+            top = odds[s_name][odds[s_name]['Prob'] > 0].head(5).iloc[::-1]
+            fig_odds = px.bar(top, x=top['Prob'] * 100, y='Player', orientation='h', text=(top['Prob'] * 100).map(lambda v: f"{v:.1f}%"), color='Player', color_discrete_map=PLAYER_COLORS)
+            fig_odds.update_traces(textposition='outside', marker_line_width=0, cliponaxis=False)
+            fig_odds.update_layout(title=dict(text=s_name.split('(')[0].strip(), font=dict(size=14, family='Rajdhani')), plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font={'color': '#AAA'}, xaxis=dict(visible=False, range=[0, 115]), yaxis=dict(title=None), showlegend=False, height=260, margin=dict(l=0, r=0, t=40, b=0))
+            with col: st.plotly_chart(fig_odds, use_container_width=True)
 
     st.markdown("<div style='height: 50px;'></div>", unsafe_allow_html=True)
-    st.markdown("<h3 style='margin-bottom:10px; font-family:Rajdhani; color:#AAA;'>🏛️ RECORDS GLOBAUX SAISON</h3>", unsafe_allow_html=True)
+    # PÉRIMÈTRE : saison en cours ou all-time (archive chargée seulement à la demande)
+    archived_seasons = past_seasons()
+    scope = "SAISON"
+    if archived_seasons:
+        scope = st.radio("Périmètre des records", ["SAISON", "ALL-TIME"], horizontal=True, key="hof_scope", label_visibility="collapsed")
+
+    if scope == "ALL-TIME":
+        st.markdown(f"<h3 style='margin-bottom:10px; font-family:Rajdhani; color:#AAA;'>🏛️ RECORDS ALL-TIME <span style='font-size:0.8rem; color:#666'>({len(archived_seasons) + 1} SAISONS)</span></h3>", unsafe_allow_html=True)
+        df_records, bp_records, daily_max_records = build_all_time(df_full_history)
+    else:
+        st.markdown("<h3 style='margin-bottom:10px; font-family:Rajdhani; color:#AAA;'>🏛️ RECORDS GLOBAUX SAISON</h3>", unsafe_allow_html=True)
+        df_records, bp_records, daily_max_records = df_full_history, bp_map, daily_max_map
 
-    full_stats_global = compute_stats(df_full_history, bp_map, daily_max_map)
+    full_stats_global = compute_stats(df_records, bp_records, daily_max_records, HOF_METRICS)
     
     goat = full_stats_global.sort_values('Moyenne', ascending=False).iloc[0]
     mvp = full_stats_global.sort_values('Moyenne_Raw', ascending=False).iloc[0]
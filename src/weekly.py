@@ -1,5 +1,9 @@
 import pandas as pd
 import numpy as np
+from src.streaks import compute_streaks, streak_history
+from src.cache import cache_by_version, process_pool
+from src.cube import rollup, level_totals, deck_winners
+from src.aggregates import pick_table, pick_slice
 
 # --- CONFIGURATION ---
 # Pas de dates, logique pure
@@ -17,42 +21,26 @@ def get_all_scorers(series):
 
 def get_global_records(df_full):
     records = {"NoCarrot": 0, "Serie30": 0}
-    for p in df_full['Player'].unique():
-        scores = df_full[df_full['Player'] == p].sort_values('Pick')['Score'].values
-        temp = 0
-        for s in scores:
-            if s >= 20: temp += 1; records["NoCarrot"] = max(records["NoCarrot"], temp)
-            else: temp = 0
-        temp = 0
-        for s in scores:
-            if s >= 30: temp += 1; records["Serie30"] = max(records["Serie30"], temp)
-            else: temp = 0
+    streaks = compute_streaks(df_full, [20, 30])
+    if not streaks.empty:
+        records["NoCarrot"] = int(streaks['Max20'].max())
+        records["Serie30"] = int(streaks['Max30'].max())
     return records
 
-def analyze_streaks_direct(df, player, current_pick_limit, global_records):
+def analyze_streaks_direct(df, player, current_pick_limit, global_records, streaks=None):
     """
     Format demandé :
     🔥Pedrille : 5 jours consécutifs > 30 pts [Série en cours] (Rec. perso : 12 I Rec. Team : 25 )
+    streaks : table compute_streaks(df, [20, 30], as_of=current_pick_limit) déjà
+    calculée pour tous les joueurs (sinon calculée pour ce joueur).
     """
-    p_df = df[(df['Player'] == player) & (df['Pick'] <= current_pick_limit)].sort_values('Pick')
-    if p_df.empty: return []
-
-    scores = p_df['Score'].values
-    curr_nc, rec_perso_nc, temp = 0, 0, 0
-    for s in scores:
-        if s >= 20: temp += 1; rec_perso_nc = max(rec_perso_nc, temp)
-        else: temp = 0
-    for s in reversed(scores):
-        if s >= 20: curr_nc += 1
-        else: break
-        
-    curr_30, rec_perso_30, temp = 0, 0, 0
-    for s in scores:
-        if s >= 30: temp += 1; rec_perso_30 = max(rec_perso_30, temp)
-        else: temp = 0
-    for s in reversed(scores):
-        if s >= 30: curr_30 += 1
-        else: break
+    if streaks is None:
+        streaks = compute_streaks(df[df['Player'] == player], [20, 30], as_of=current_pick_limit)
+    if streaks.empty or player not in streaks.index: return []
+
+    row = streaks.loc[player]
+    curr_nc, rec_perso_nc = int(row['Current20']), int(row['Max20'])
+    curr_30, rec_perso_30 = int(row['Current30']), int(row['Max30'])
 
     lines = []
     
@@ -80,24 +68,68 @@ def analyze_streaks_direct(df, player, current_pick_limit, global_records):
         
     return lines
 
+def _deck_slice(df, deck):
+    """Lignes du Deck : tranche de picks (table par pick) si ses picks se suivent, sinon filtre."""
+    table = pick_table(df)
+    picks = table.index[table['Deck'] == deck] if not table.empty else []
+    if len(picks) and picks[-1] - picks[0] + 1 == len(picks):
+        return pick_slice(df, picks[0], picks[-1])
+    return df[df['Deck'] == deck]
+
+
+# Un rapport par (version des données, Deck) : rouvrir un Deck ne recalcule rien
+@cache_by_version(max_entries=32)
 def generate_weekly_report_data(df_full, target_deck_num=None):
     if df_full.empty or 'Deck' not in df_full.columns: return None
 
-    df = df_full.copy()
+    df = df_full  # Lecture seule : pas de copie défensive
     max_deck = int(df['Deck'].max())
     target_deck = int(target_deck_num) if target_deck_num else max_deck
     if target_deck == 0: return None
     
-    week_df = df[df['Deck'] == target_deck].copy()
+    week_df = _deck_slice(df, target_deck)
     if week_df.empty: return None
-    
+
+    shared = _shared_context(df)
+
+    # Titres RotW des Decks précédents : vainqueurs lus dans le cube
+    rotw_history = {}
+    winners = deck_winners(df)
+    for p in winners.loc[(winners['Deck'] < target_deck) & (winners['Deck'] != 0), 'Player']:
+        rotw_history[p] = rotw_history.get(p, 0) + 1
+
+    # Séries de tous les joueurs à la date du dernier pick du Deck, en un seul appel
+    week_streaks = compute_streaks(df, [20, 30], as_of=int(week_df['Pick'].max()))
+    return _build_report(shared, target_deck, week_df, rotw_history, week_streaks)
+
+
+@cache_by_version(max_entries=4)
+def _shared_context(df):
+    """Données communes à tous les rapports d'une même version : cube Deck, moyennes d'équipe, records."""
+    cube = rollup(df, 'Deck')
+    return {
+        'max_deck': int(df['Deck'].max()),
+        'deck_tracks': df.attrs.get('deck_tracks', {}),
+        'cube': cube,
+        'decks': level_totals(cube),
+        'records': get_global_records(df),
+    }
+
+
+def _build_report(shared, target_deck, week_df, rotw_history, week_streaks):
+    """
+    Rapport d'un Deck à partir du contexte partagé.
+    rotw_history : {joueur: titres RotW des Decks précédents} (modifié en place) ;
+    week_streaks : séries à la date du dernier pick du Deck, par joueur.
+    """
+    max_deck = shared['max_deck']
     first_pick = int(week_df['Pick'].min())
     last_pick = int(week_df['Pick'].max())
     period_str = f"Picks #{first_pick} à #{last_pick}"
     
     # --- VERIFICATION INTEGRITE (NOUVEAU) ---
     # On récupère le plan théorique du Deck depuis le loader
-    expected_picks = df_full.attrs.get('deck_tracks', {}).get(target_deck, [])
+    expected_picks = shared['deck_tracks'].get(target_deck, [])
     is_complete = True
     
     if expected_picks:
@@ -108,34 +140,30 @@ def generate_weekly_report_data(df_full, target_deck_num=None):
             # On met à jour la période affichée pour montrer ce qui manque
             period_str += f" (Attente Pick #{last_expected})"
     
+    # Agrégats (Deck, Joueur) : cube construit une fois par version des données
+    cube = shared['cube']
+    week = cube.loc[target_deck]
+    decks = shared['decks']
+
     # Team Metrics
-    team_avg = week_df['Score'].mean()
+    team_avg = decks.at[target_deck, 'Moyenne']
     prev_deck = target_deck - 1
     diff_txt = ""
     if prev_deck > 0:
-        prev_df = df[df['Deck'] == prev_deck]
-        if not prev_df.empty:
-            diff = team_avg - prev_df['Score'].mean()
+        if prev_deck in decks.index:
+            diff = team_avg - decks.at[prev_deck, 'Moyenne']
             sign = "+" if diff > 0 else ""
             diff_txt = f"{sign}{diff:.1f} vs Deck {prev_deck}"
 
     discord_color = 5763719 if team_avg >= 40 else (16705372 if team_avg >= 30 else 15548997)
 
     # Podium
-    stats_week = week_df.groupby('Player')['Score'].agg(['mean', 'sum', 'count']).sort_values('mean', ascending=False)
+    stats_week = week[['Moyenne', 'Total', 'Games']].set_axis(['mean', 'sum', 'count'], axis=1).sort_values('mean', ascending=False)
     
-    rotw_history = {}
-    past_decks = df[df['Deck'] < target_deck]['Deck'].unique()
-    for d in past_decks:
-        if d == 0: continue
-        ds = df[df['Deck'] == d].groupby('Player')['Score'].sum()
-        if not ds.empty:
-            for p in ds[ds == ds.max()].index: rotw_history[p] = rotw_history.get(p, 0) + 1
-
     weekly_podium = []
     for i, (player, row) in enumerate(stats_week.head(3).iterrows()):
         nb_rotw = rotw_history.get(player, 0)
-        total_leader = week_df.groupby('Player')['Score'].sum().idxmax()
+        total_leader = week['Total'].idxmax()
         is_official_winner = (player == total_leader)
         
         if is_official_winner: 
@@ -148,33 +176,25 @@ def generate_weekly_report_data(df_full, target_deck_num=None):
     rotw_leaderboard = sorted([(k, v) for k, v in rotw_history.items() if v > 0], key=lambda x: x[1], reverse=True)
 
     # Listes
-    bp_series = week_df.groupby('Player')['IsBP'].sum()
+    bp_series = week['BP_Count']
     snipers = get_all_scorers(bp_series[bp_series > 0])
     
-    max_g = week_df.groupby('Player')['Score'].count().max()
-    elig = week_df.groupby('Player')['Score'].count()
-    elig = elig[elig >= (max_g - 1)].index
-    murailles = []
-    if not elig.empty:
-        sub = week_df[week_df['Player'].isin(elig)]
-        carrots = sub[sub['Score'] < 20].groupby('Player')['Score'].count()
-        clean = [p for p in elig if p not in carrots.index or carrots[p] == 0]
-        murailles = [(p, 0) for p in clean]
+    max_g = week['Games'].max()
+    elig = week[week['Games'] >= (max_g - 1)]
+    murailles = [(p, 0) for p in elig.index[elig['Carottes'] == 0]]
 
     remontada = []
     if prev_deck > 0:
-        c_avg = week_df.groupby('Player')['Score'].mean()
-        p_avg = df[df['Deck'] == prev_deck].groupby('Player')['Score'].mean()
+        c_avg = week['Moyenne']
+        p_avg = cube.loc[prev_deck, 'Moyenne'] if prev_deck in decks.index else pd.Series(dtype=float)
         prog = (c_avg - p_avg).dropna()
         remontada = get_winners_list(prog[prog > 0], maximize=True)
         remontada = [(p, f"+{v:.1f}") for p, v in remontada]
 
-    sunday_winners = get_winners_list(week_df[week_df['Pick'] == week_df['Pick'].max()].groupby('Player')['Score'].max())
+    sunday_winners = get_winners_list(week_df[week_df['Pick'] == week_df['Pick'].max()].groupby('Player', observed=True)['Score'].max())
 
-    perfects = []
-    for p in week_df['Player'].unique():
-        scores = week_df[week_df['Player'] == p]['Score']
-        if len(scores) >= 4 and scores.min() >= 30: perfects.append(p)
+    perfect_set = set(week.index[(week['Games'] >= 4) & (week['Min'] >= 30)])
+    perfects = [p for p in week_df['Player'].unique() if p in perfect_set]
 
     daily_mvps = []
     for p_num in sorted(week_df['Pick'].unique()):
@@ -184,10 +204,9 @@ def generate_weekly_report_data(df_full, target_deck_num=None):
         mvps = d_data[d_data['Score'] == max_s]['Player'].tolist()
         daily_mvps.append(f"**Pick #{int(p_num)}** : {', '.join(mvps)} ({int(max_s)})")
 
-    global_recs = get_global_records(df)
     analysis_lines = []
     for p in week_df['Player'].unique():
-        lines = analyze_streaks_direct(df, p, int(week_df['Pick'].max()), global_recs)
+        lines = analyze_streaks_direct(week_df, p, last_pick, shared['records'], streaks=week_streaks)
         if lines:
             analysis_lines.extend(lines)
 
@@ -215,8 +234,65 @@ def generate_weekly_report_data(df_full, target_deck_num=None):
         "stats": {
             "avg": team_avg,
             "diff": diff_txt,
-            "bp": week_df['IsBP'].sum(),
-            "carrots": len(week_df[week_df['Score'] < 20]),
+            "bp": week['BP_Count'].sum(),
+            "carrots": int(week['Carottes'].sum()),
             "safe_zone": safe_zone_count
         }
     }
+
+
+# --- RAPPORTS DE TOUTE LA SAISON (EN LOT) ---
+# Récap de saison, rattrapage, archive : un rapport par Deck en un seul passage.
+# Contexte partagé calculé une fois (cube, records), frames des Decks par un seul
+# groupby, titres RotW cumulés Deck après Deck et séries "à date" lues dans
+# streak_history au lieu d'un rescan de la saison par Deck.
+
+def _reports_chunk(shared, jobs):
+    """Rapports d'une liste de (Deck, week_df, titres RotW, séries)."""
+    return {deck: _build_report(shared, deck, week_df, rotw, streaks) for deck, week_df, rotw, streaks in jobs}
+
+
+def generate_all_weekly_reports(df_full, decks=None, workers=None):
+    """
+    {Deck: rapport} pour tous les Decks joués (ou ceux de `decks`, None si vide),
+    identique à generate_weekly_report_data Deck par Deck.
+    workers > 1 : rapports construits par blocs sur le pool de processus.
+    """
+    if df_full.empty or 'Deck' not in df_full.columns: return {}
+
+    df = df_full
+    frames = {int(deck): frame for deck, frame in df.groupby('Deck', sort=True)}
+    for frame in frames.values():
+        frame.attrs = {}  # deck_tracks est dans le contexte partagé : pas de deepcopy à chaque opération
+    targets = sorted(d for d in frames if d != 0) if decks is None else [int(d) for d in decks]
+    reports = {deck: None for deck in targets}
+    wanted = {d for d in targets if d != 0 and d in frames}
+    if not wanted:
+        return reports
+
+    shared = _shared_context(df)
+    history = streak_history(df, [20, 30])
+    winners = {}
+    for deck, p in deck_winners(df).itertuples(index=False):
+        if deck != 0:
+            winners.setdefault(int(deck), []).append(p)
+
+    # Decks dans l'ordre : titres RotW cumulés des Decks précédents
+    jobs, rotw_history = [], {}
+    for deck, week_df in frames.items():
+        if deck in wanted:
+            # Séries à date = ligne du dernier pick de chaque joueur dans le Deck
+            last_rows = week_df.drop_duplicates('Player', keep='last')
+            streaks = history.loc[last_rows.index].set_axis(pd.Index(last_rows['Player'].astype(object), name='Player'))
+            jobs.append((deck, week_df, dict(rotw_history), streaks))
+        for p in winners.get(deck, []):
+            rotw_history[p] = rotw_history.get(p, 0) + 1
+
+    if workers and workers > 1 and len(jobs) > 1:
+        chunks = [list(c) for c in np.array_split(np.arange(len(jobs)), min(workers, len(jobs)))]
+        futures = [process_pool().submit(_reports_chunk, shared, [jobs[i] for i in c]) for c in chunks]
+        for f in futures:
+            reports.update(f.result())
+    else:
+        reports.update(_reports_chunk(shared, jobs))
+    return reports